@@ -0,0 +1,135 @@
+"""
+Local stand-in for sgschooling.com serving the HTML fixtures, with
+configurable per-response latency, so scraper runs can be timed without
+touching the real site.
+
+    python -m benchmarks.fixture_server --port 8765 --latency 0.05
+    BASE_URL=http://127.0.0.1:8765 python scraper.py
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MAIN_PAGE_PATH = "/secondary/cop/all"
+DETAIL_FIXTURES = ("detail_plain.html", "detail_affiliated.html", "detail_hcl.html")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fixtures = self.server.fixtures
+        fixtures.delay()
+        path = self.path.split("?", 1)[0]
+        if path == MAIN_PAGE_PATH:
+            body = fixtures.main_page
+        elif path.startswith("/secondary/"):
+            body = fixtures.detail_page(path)
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer:
+    """
+    Serves the main page fixture at /secondary/cop/all and a detail page
+    fixture for every other /secondary/<slug>, picked by a stable hash of
+    the slug. Each response is delayed by ``latency`` seconds plus up to
+    ``jitter`` more. Runs on a background thread; use as a context manager.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fixtures_dir: str = FIXTURES_DIR,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.main_page = self._read(fixtures_dir, "main_page.html")
+        self.details = [self._read(fixtures_dir, name) for name in DETAIL_FIXTURES]
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fixtures = self
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _read(fixtures_dir: str, name: str) -> bytes:
+        with open(os.path.join(fixtures_dir, name), "rb") as f:
+            return f.read()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self):
+        with self._lock:
+            self.requests += 1
+        pause = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if pause > 0:
+            time.sleep(pause)
+
+    def detail_page(self, path: str) -> bytes:
+        return self.details[zlib.crc32(path.encode("utf-8")) % len(self.details)]
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the benchmark fixtures as a local sgschooling.com")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response (default: 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds (default: 0)")
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port, latency=args.latency, jitter=args.jitter)
+    print(f"Serving fixtures at {server.url}{MAIN_PAGE_PATH} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
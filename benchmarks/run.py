@@ -0,0 +1,220 @@
+"""
+Benchmarks for the scraper's hot paths, run against the HTML fixtures.
+
+Micro-benchmarks time parsing (main page, each detail page fixture with
+each parser backend), cut-off cell cleaning, School.to_dict and
+CSVWriter.write. The end-to-end benchmark runs SchoolScraper against a
+local FixtureServer with configurable latency.
+
+    python -m benchmarks.run                       # everything
+    python -m benchmarks.run -k detail --no-e2e    # only matching micro-benchmarks
+    python -m benchmarks.run --json bench.json     # save results
+    python -m benchmarks.run --compare bench.json  # show change against saved results
+"""
+
+import argparse
+import builtins
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import timeit
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional
+from benchmarks.fixture_server import DETAIL_FIXTURES, FIXTURES_DIR, FixtureServer, MAIN_PAGE_PATH
+from config import Config
+from models.cutoff import parse_cutoff_cell
+from models.school import School, export_years
+from parsers import DETAIL_PARSER_BACKENDS
+from parsers.main_page_parser import MainPageParser
+from utils.csv_writer import CSVWriter
+
+# Cut-off cells covering every format parse_cutoff_cell handles
+CUTOFF_CELLS = (
+    "8", "22", "6M", "7M-", "6M8M", "6M 8M", "713", "2125", "12 - 16", "6M- 8M",
+    "5 - 910 - 22", "5 - 9M8M- 12", "4 - 6M6M - 8M", "1 - 2022 - 25", "-", "",
+)
+
+
+def _read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def bench(name: str, func: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """Time func: calls per repeat chosen so one repeat takes at least min_time"""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [elapsed / number] + [t / number for t in timer.repeat(repeat - 1, number)]
+    best, median = min(runs), statistics.median(runs)
+    return {
+        "name": name,
+        "best_us": round(best * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "ops_per_sec": round(1 / best, 1),
+        "calls": number * repeat,
+    }
+
+
+def scraped_schools() -> List[School]:
+    """Schools from the main page fixture, completed with detail page fixture data"""
+    schools = MainPageParser(_read_fixture("main_page.html")).parse()
+    details = [DETAIL_PARSER_BACKENDS["lxml"](_read_fixture(name)).parse() for name in DETAIL_FIXTURES]
+    completed = []
+    for i, school in enumerate(schools):
+        town, address, history = details[i % len(details)]
+        school = replace(school, cutoffs=list(school.cutoffs), town=town, address=address)
+        school.apply_history(history, current_year=Config.COP_YEAR)
+        completed.append(school)
+    return completed
+
+
+def micro_benchmarks(tmp_dir: str) -> Dict[str, Callable[[], object]]:
+    main_html = _read_fixture("main_page.html")
+    benchmarks = {"main_page_parse": lambda: MainPageParser(main_html).parse()}
+
+    for fixture in DETAIL_FIXTURES:
+        html = _read_fixture(fixture)
+        label = fixture[len("detail_"):-len(".html")]
+        for backend, parser_class in sorted(DETAIL_PARSER_BACKENDS.items()):
+            benchmarks[f"detail_page_parse[{backend}:{label}]"] = (
+                lambda parser_class=parser_class, html=html: parser_class(html).parse()
+            )
+
+    # Uncached, so every call does the cleaning work; the cached path is a dict lookup
+    uncached = parse_cutoff_cell.__wrapped__
+    benchmarks[f"parse_cutoff_cell[{len(CUTOFF_CELLS)} cells]"] = lambda: [uncached(c) for c in CUTOFF_CELLS]
+    benchmarks[f"parse_cutoff_cell_cached[{len(CUTOFF_CELLS)} cells]"] = (
+        lambda: [parse_cutoff_cell(c) for c in CUTOFF_CELLS]
+    )
+
+    schools = scraped_schools()
+    years = export_years(schools)
+    benchmarks["school_to_dict"] = lambda: schools[0].to_dict(years)
+    benchmarks[f"school_to_dict[{len(schools)} schools]"] = lambda: [s.to_dict(years) for s in schools]
+
+    csv_path = os.path.join(tmp_dir, "bench.csv")
+
+    def write_csv():
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):  # commit() reports each export
+            CSVWriter(csv_path).write(schools, years)
+
+    benchmarks[f"csv_writer_write[{len(schools)} schools]"] = write_csv
+    return benchmarks
+
+
+@contextmanager
+def _patched(obj, **values):
+    saved = {name: getattr(obj, name) for name in values}
+    for name, value in values.items():
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(obj, name, value)
+
+
+def end_to_end(tmp_dir: str, latency: float, workers: int, rate: float) -> Dict[str, object]:
+    """Full scrape against a local fixture server; rate caps requests per second"""
+    # Imported here so the scraper's logging setup only applies to this benchmark
+    import scraper as scraper_module
+    from utils.journal import ScrapeJournal
+    from utils.page_archive import PageArchive
+    from utils.rate_limiter import RateLimiter
+
+    scraper_module.logger.setLevel(logging.WARNING)
+    with FixtureServer(latency=latency) as server, _patched(
+        Config,
+        BASE_URL=server.url,
+        MAIN_PAGE_URL=f"{server.url}{MAIN_PAGE_PATH}",
+        OUTPUT_FILE=os.path.join(tmp_dir, "schools.csv"),
+        METRICS_FILE=os.path.join(tmp_dir, "scrape_metrics.json"),
+        METRICS_PROM_FILE=os.path.join(tmp_dir, "scrape_metrics.prom"),
+        DELTA_FILE=os.path.join(tmp_dir, "schools_delta.json"),
+        DERIVED_FILE=os.path.join(tmp_dir, "schools_metrics.csv"),
+        SQLITE_FILE="",
+        CACHE_ENABLED=False,
+    ), _patched(builtins, input=lambda prompt="": "y"):  # Answer the preview prompt
+        scraper = scraper_module.SchoolScraper(max_workers=workers)
+        scraper.journal = ScrapeJournal(os.path.join(tmp_dir, "scrape_journal.jsonl"))
+        if scraper.archive:
+            scraper.archive = PageArchive(os.path.join(tmp_dir, "archive"))
+        scraper.rate_limiter = RateLimiter(delay=1.0 / rate, burst=workers, max_rate=rate)
+        scraper.http_client.rate_limiter = scraper.rate_limiter
+
+        start = time.perf_counter()
+        scraper.run()
+        elapsed = time.perf_counter() - start
+
+    return {
+        "name": f"end_to_end[latency={latency}s workers={workers}]",
+        "seconds": round(elapsed, 3),
+        "schools": len(scraper.schools),
+        "requests": server.requests,
+        "schools_per_sec": round(len(scraper.schools) / elapsed, 2),
+        "stages": {name: round(seconds, 3) for name, seconds in scraper.metrics.stages.items()},
+    }
+
+
+def _print_result(result: dict, baseline: Optional[dict]):
+    if "best_us" in result:
+        line = f"{result['name']:<48} {result['best_us']:>12.1f} µs  (median {result['median_us']:.1f} µs)"
+        key = "best_us"
+    else:
+        stages = ", ".join(f"{name} {seconds}s" for name, seconds in result["stages"].items())
+        line = f"{result['name']:<48} {result['seconds']:>12.2f} s   ({result['schools_per_sec']} schools/s; {stages})"
+        key = "seconds"
+    if baseline and baseline.get(result["name"], {}).get(key):
+        change = (result[key] / baseline[result["name"]][key] - 1) * 100
+        line += f"  {change:+.1f}% vs baseline"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing, export and end-to-end scraping")
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--no-e2e", action="store_true", help="Skip the end-to-end benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fixture server latency in seconds (default: 0.05)")
+    parser.add_argument("--workers", type=int, default=Config.MAX_WORKERS, help=f"Scraper workers (default: {Config.MAX_WORKERS})")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Rate limit for the end-to-end run, req/s (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats per micro-benchmark (default: 5)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, func in micro_benchmarks(tmp_dir).items():
+            if args.filter and args.filter not in name:
+                continue
+            result = bench(name, func, repeat=args.repeat)
+            _print_result(result, baseline)
+            results.append(result)
+
+        if not args.no_e2e and (not args.filter or args.filter in "end_to_end"):
+            result = end_to_end(tmp_dir, args.latency, args.workers, args.rate)
+            _print_result(result, baseline)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+        print(f"\n✓ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compare detail page parser backends on the same pages: check that every
+backend produces identical output and report parse throughput.
+"""
+
+import argparse
+import json
+import os
+import time
+from config import Config
+from parsers import DETAIL_PARSER_BACKENDS
+
+
+def load_cached_pages(cache_dir: str) -> dict:
+    """Load detail pages stored by the HTTP cache, keyed by URL."""
+    with open(os.path.join(cache_dir, "index.json"), "r", encoding="utf-8") as f:
+        index = json.load(f)
+
+    pages = {}
+    for key, entry in index.items():
+        if entry["url"] == Config.MAIN_PAGE_URL:
+            continue
+        with open(os.path.join(cache_dir, f"{key}.body"), "rb") as f:
+            pages[entry["url"]] = f.read().decode(entry.get("encoding") or "utf-8", "replace")
+    return pages
+
+
+def load_files(paths: list[str]) -> dict:
+    """Load HTML files, keyed by path."""
+    pages = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages[path] = f.read()
+    return pages
+
+
+def compare(pages: dict, repeat: int):
+    """Parse every page with every backend, then report mismatches and timings."""
+    results = {}
+    for name, parser_class in DETAIL_PARSER_BACKENDS.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outputs = {source: parser_class(html).parse() for source, html in pages.items()}
+        elapsed = time.perf_counter() - start
+        results[name] = outputs
+
+        per_page = elapsed / (repeat * len(pages)) * 1000
+        print(f"{name:>6}: {per_page:.3f} ms/page, {len(pages) * repeat / elapsed:.0f} pages/s")
+
+    reference_name, reference = next(iter(results.items()))
+    mismatches = 0
+    for name, outputs in results.items():
+        for source, output in outputs.items():
+            if output != reference[source]:
+                mismatches += 1
+                print(f"\nMismatch ({reference_name} vs {name}) for {source}:")
+                print(f"  {reference_name}: {reference[source]}")
+                print(f"  {name}: {output}")
+
+    print(f"\nCompared {len(pages)} pages: {mismatches} mismatches")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare detail page parser backends for output and speed"
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="Detail page HTML files (default: detail pages in the HTTP cache)"
+    )
+    parser.add_argument(
+        "-n", "--repeat",
+        type=int,
+        default=5,
+        help="Times to parse each page per backend (default: 5)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=Config.CACHE_DIR,
+        help=f"HTTP cache directory to read pages from (default: {Config.CACHE_DIR})"
+    )
+
+    args = parser.parse_args()
+
+    pages = load_files(args.files) if args.files else load_cached_pages(args.cache_dir)
+    if not pages:
+        print("No pages to compare")
+        return
+
+    compare(pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,16 +8,80 @@ class Config:
     """Configuration settings for the scraper"""
 
     # URLs
-    BASE_URL = "https://sgschooling.com"
+    BASE_URL = os.getenv("BASE_URL", "https://sgschooling.com")  # e.g. a local benchmarks.fixture_server
     MAIN_PAGE_URL = f"{BASE_URL}/secondary/cop/all"
 
+    # Cohort year of the cut-off points listed on the main page
+    COP_YEAR = int(os.getenv("COP_YEAR", "2025"))
+    # Years exported as CSV columns: COP_YEAR and the years before it, newest first
+    HISTORY_YEARS = int(os.getenv("HISTORY_YEARS", "3"))
+    EXPORT_YEARS = list(range(COP_YEAR, COP_YEAR - HISTORY_YEARS, -1))
+
     # Rate Limiting
     REQUEST_DELAY = float(os.getenv("REQUEST_DELAY", "2.0"))  # seconds
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     TIMEOUT = int(os.getenv("TIMEOUT", "30"))
+    RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "2"))  # requests
+    RATE_LIMIT_MIN = float(os.getenv("RATE_LIMIT_MIN", "0.1"))  # requests/second
+    RATE_LIMIT_MAX = float(os.getenv("RATE_LIMIT_MAX", "2.0"))  # requests/second
+    LATENCY_TARGET = float(os.getenv("LATENCY_TARGET", "3.0"))  # seconds, slower responses back off
+
+    # Concurrency
+    MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))  # detail page fetch threads
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))  # parse processes, 0 = in-thread
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))  # pages buffered between stages
+
+    # Durable work queue for distributed_scrape.py (SQLite in WAL mode; single host only)
+    QUEUE_FILE = os.getenv("QUEUE_FILE", "data/work_queue.db")
+    QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "60"))  # extended by heartbeats
+    QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))  # then dead-lettered
+    QUEUE_RETRY_BACKOFF = float(os.getenv("QUEUE_RETRY_BACKOFF", "30"))  # seconds, doubled per attempt
+
+    # Parsing
+    PARSER_BACKEND = os.getenv("PARSER_BACKEND", "bs4")  # detail pages: 'lxml' or 'bs4'
+
+    # HTTP cache
+    CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") not in ("0", "false", "no")
+    CACHE_DIR = os.getenv("CACHE_DIR", ".cache/http")
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "0"))  # seconds served without revalidating (0: always revalidate)
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+    # Archive of every fetched page (zstd, content-addressed) for offline re-parsing
+    ARCHIVE_ENABLED = os.getenv("ARCHIVE", "1") not in ("0", "false", "no")
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data/archive")
+
+    # Geocoding (OneMap-compatible search endpoint; OneMap allows ~250 requests/minute)
+    GEOCODER_URL = os.getenv("GEOCODER_URL", "https://www.onemap.gov.sg/api/common/elastic/search")
+    GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", "4"))
+    GEOCODE_RATE = float(os.getenv("GEOCODE_RATE", "3.0"))  # requests/second
+    GEOCODE_CACHE = os.getenv("GEOCODE_CACHE", "data/geocode_cache.json")
+    COORDINATES_FILE = os.getenv("COORDINATES_FILE", "data/school_coordinates.json")
+
+    # Confirmed school name mappings between sources (e.g. MOE names -> scraped names)
+    NAME_MATCH_CACHE = os.getenv("NAME_MATCH_CACHE", "data/name_matches.json")
+
+    # Enrichment: higher mother tongue lists, enriched CSV and the frontend's copy
+    HMT_FILE = os.getenv("HMT_FILE", "data/higher_mother_tongue.json")
+    ENRICHED_FILE = os.getenv("ENRICHED_FILE", "data/coord.csv")
+    FRONTEND_FILE = os.getenv("FRONTEND_FILE", "school-finder/public/schools.csv")
 
     # Output
     OUTPUT_FILE = os.getenv("OUTPUT_FILE", "data/schools.csv")
+    CSV_FLUSH_EVERY = int(os.getenv("CSV_FLUSH_EVERY", "10"))  # rows between flushes of the partial CSV
+    # Also write typed Arrow IPC (stage handoff) and Parquet (archival) copies next to each CSV
+    COLUMNAR_EXPORT = os.getenv("COLUMNAR_EXPORT", "1") not in ("0", "false", "no")
+    JOURNAL_FILE = os.getenv("JOURNAL_FILE", "data/scrape_journal.jsonl")
+    # Changes against the previous OUTPUT_FILE, written on every export (empty to disable)
+    DELTA_FILE = os.getenv("DELTA_FILE", "data/schools_delta.json")
+    # Per-school cut-off metrics (max/min, year-over-year changes, trend, volatility)
+    # computed from OUTPUT_FILE on every export (empty to disable)
+    DERIVED_FILE = os.getenv("DERIVED_FILE", "data/schools_metrics.csv")
+    # Optional SQLite database (WAL mode) with every run's schools, cut-off history,
+    # coordinates and HMT offerings, e.g. data/schools.db (empty to disable)
+    SQLITE_FILE = os.getenv("SQLITE_FILE", "")
+    # Per-run metrics, as JSON and in the Prometheus text format
+    METRICS_FILE = os.getenv("METRICS_FILE", "data/scrape_metrics.json")
+    METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE", "data/scrape_metrics.prom")
 
     # Headers
     USER_AGENT = "Mozilla/5.0 (Educational Research Bot)"
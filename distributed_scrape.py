@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Scrape detail pages through a durable work queue, so the work can be spread
+over any number of worker processes on this machine. The queue is a SQLite
+file in WAL mode, which needs shared memory between its users, so every
+worker must run on the host that holds the file.
+
+    python distributed_scrape.py seed          # fetch the main page, queue every detail page
+    python distributed_scrape.py worker        # run a worker (start as many as you like)
+    python distributed_scrape.py merge         # export the CSV from the results
+    python distributed_scrape.py run -n 4      # all of the above with 4 local workers
+    python distributed_scrape.py status
+
+Workers share one rate limit through the queue file, so adding workers
+speeds a scrape up only until that politeness budget is used up.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import time
+from dataclasses import asdict
+from typing import Optional
+from config import Config
+from models.cutoff import CutoffRecord
+from models.school import School
+from parsers import DETAIL_PARSER_BACKENDS
+from scraper import SchoolScraper, _parse_detail_page
+from utils.http_client import HTTPClient
+from utils.page_archive import PageArchive
+from utils.work_queue import Heartbeat, SharedRateLimiter, WorkQueue, default_worker_id
+
+logger = logging.getLogger(__name__)
+
+DETAIL_QUEUE = "detail_pages"
+POLL_INTERVAL = 2.0  # seconds between checks of a queue with nothing ready
+
+
+class QueueCoordinator(SchoolScraper):
+    """Seeds the queue from the main page and merges the workers' results into the export"""
+
+    def __init__(self, work_queue: WorkQueue, queue: str = DETAIL_QUEUE, **kwargs):
+        super().__init__(**kwargs)
+        self.work_queue = work_queue
+        self.queue = queue
+
+    def seed(self, fresh: bool = True) -> int:
+        """Queue every school's detail page; returns the number of tasks added"""
+        try:
+            with self.metrics.stage("main_page"):
+                schools = self._scrape_main_page()
+        finally:
+            self.http_client.close()
+            self._close_archive()
+        if fresh:
+            self.work_queue.clear(self.queue)
+        added = self.work_queue.enqueue(
+            self.queue, ((school.detail_url, {"school": asdict(school)}) for school in schools)
+        )
+        logger.info(f"✓ Queued {added} of {len(schools)} detail pages in {self.work_queue.path}")
+        return added
+
+    def merge(self):
+        """Export every queued school, with detail page data where its task succeeded"""
+        try:
+            with self.recorded_run("merge"):
+                self.schools = []
+                for task in self.work_queue.tasks(self.queue):
+                    school = School.from_dict(task.payload["school"])
+                    if task.status == "done":
+                        result = task.result
+                        history = [CutoffRecord(**record) for record in result["history"]]
+                        self._apply_detail_data(school, result["town"], result["address"], history)
+                    else:
+                        # Exported with its main page data only, like a failed fetch in run()
+                        logger.warning(f"  ⚠ No detail data for {school.name} ({task.status}: {task.error})")
+                    self.schools.append(school)
+                self.export()
+            # Workers leave dictionary training to this single process
+            if self.archive and self.archive.dictionary is None and self.archive.train_dictionary():
+                logger.info(f"🗃 Trained zstd dictionary {self.archive.dictionary.dict_id()} and recompressed the archive")
+        finally:
+            self.http_client.close()  # Results come from the queue
+            self._write_metrics()
+
+
+class QueueWorker:
+    """Leases detail page tasks, fetches, archives and parses them, and stores the parsed results"""
+
+    def __init__(
+        self,
+        work_queue: WorkQueue,
+        queue: str = DETAIL_QUEUE,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = Config.QUEUE_LEASE_SECONDS,
+        parser_backend: str = Config.PARSER_BACKEND,
+    ):
+        self.work_queue = work_queue
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.parser_backend = parser_backend
+        # No HTTP cache: its index file isn't safe to share between processes
+        self.http_client = HTTPClient(pool_size=1, rate_limiter=SharedRateLimiter(work_queue))
+        self.archive = PageArchive() if Config.ARCHIVE_ENABLED else None
+        self.completed = 0
+        self.failed = 0
+
+    def process(self, url: str) -> dict:
+        response = self.http_client.get(url)
+        encoding = response.encoding or response.apparent_encoding
+        if self.archive:
+            self.archive.store(url, response.content, encoding=encoding)
+        (town, address, history), _ = _parse_detail_page(self.parser_backend, response.content, encoding)
+        return {"town": town, "address": address, "history": [asdict(record) for record in history]}
+
+    def run(self, wait: bool = False):
+        """Work until the queue is drained (or forever with wait)"""
+        logger.info(f"Worker {self.worker_id} pulling from {self.work_queue.path}")
+        try:
+            while True:
+                task = self.work_queue.lease(self.queue, self.worker_id, self.lease_seconds)
+                if task is None:
+                    if not wait and self.work_queue.is_drained(self.queue):
+                        break
+                    ready_in = self.work_queue.next_ready_in(self.queue)
+                    time.sleep(min(POLL_INTERVAL, ready_in) if ready_in is not None else POLL_INTERVAL)
+                    continue
+                self._run_task(task)
+        finally:
+            self.http_client.close()
+            self.work_queue.close()
+            if self.archive:
+                self.archive.close(train=False)
+        logger.info(f"Worker {self.worker_id} done: {self.completed} completed, {self.failed} failed")
+
+    def _run_task(self, task):
+        with Heartbeat(self.work_queue, task, self.worker_id, self.lease_seconds):
+            try:
+                result = self.process(task.url)
+            except Exception as e:
+                status = self.work_queue.fail(task, self.worker_id, str(e))
+                self.failed += 1
+                logger.warning(f"  ⚠ {task.url} (attempt {task.attempts}): {e} -> {status}")
+                return
+        if self.work_queue.complete(task, self.worker_id, result):
+            self.completed += 1
+            logger.info(f"  ✓ {task.payload['school']['name']}")
+        else:
+            logger.warning(f"  ⚠ Lost the lease on {task.url}; another worker will redo it")
+
+
+def _worker_main(queue_file: str, parser_backend: str, worker_id: str):
+    QueueWorker(WorkQueue(queue_file), worker_id=worker_id, parser_backend=parser_backend).run()
+
+
+def print_status(work_queue: WorkQueue):
+    counts = work_queue.counts(DETAIL_QUEUE)
+    print(f"{work_queue.path} [{DETAIL_QUEUE}]: " + ", ".join(
+        f"{counts.get(status, 0)} {status}" for status in ("pending", "leased", "done", "dead")
+    ))
+    for task in work_queue.tasks(DETAIL_QUEUE, status="dead"):
+        print(f"  dead: {task.url} after {task.attempts} attempts: {task.error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape detail pages through a shared work queue")
+    parser.add_argument(
+        "command",
+        choices=("seed", "worker", "merge", "run", "status", "requeue-dead"),
+        help="seed the queue, run a worker, merge results, do all three locally, or inspect the queue",
+    )
+    parser.add_argument(
+        "--queue-file",
+        default=Config.QUEUE_FILE,
+        help=f"SQLite queue file, shared by all workers on this host (default: {Config.QUEUE_FILE})",
+    )
+    parser.add_argument(
+        "-n", "--workers",
+        type=int,
+        default=Config.MAX_WORKERS,
+        help=f"Worker processes started by 'run' (default: {Config.MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=sorted(DETAIL_PARSER_BACKENDS),
+        default=Config.PARSER_BACKEND,
+        help=f"Detail page parser backend (default: {Config.PARSER_BACKEND})",
+    )
+    parser.add_argument("--worker-id", help="Worker name in leases (default: host-pid)")
+    parser.add_argument("--wait", action="store_true", help="Keep a worker polling after the queue drains")
+    parser.add_argument("--keep", action="store_true", help="With seed, add to the existing queue instead of replacing it")
+    args = parser.parse_args()
+
+    work_queue = WorkQueue(args.queue_file)
+    if args.command == "status":
+        print_status(work_queue)
+    elif args.command == "requeue-dead":
+        print(f"Requeued {work_queue.requeue_dead(DETAIL_QUEUE)} dead tasks")
+    elif args.command == "seed":
+        QueueCoordinator(work_queue, parser_backend=args.parser).seed(fresh=not args.keep)
+    elif args.command == "worker":
+        QueueWorker(work_queue, worker_id=args.worker_id, parser_backend=args.parser).run(wait=args.wait)
+    elif args.command == "merge":
+        QueueCoordinator(work_queue, parser_backend=args.parser).merge()
+    else:
+        start = time.perf_counter()
+        QueueCoordinator(work_queue, parser_backend=args.parser).seed(fresh=not args.keep)
+        work_queue.close()  # Workers open their own connections
+        workers = [
+            multiprocessing.Process(
+                target=_worker_main,
+                args=(args.queue_file, args.parser, f"{default_worker_id()}-{i}"),
+            )
+            for i in range(max(1, args.workers))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        print_status(work_queue)
+        QueueCoordinator(work_queue, parser_backend=args.parser).merge()
+        logger.info(f"✓ Done in {time.perf_counter() - start:.1f}s with {len(workers)} workers")
+
+
+if __name__ == "__main__":
+    main()
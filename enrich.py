@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Enrich the scraped schools CSV in one streaming pass: derived gender,
+coordinates, higher mother tongue flags and the scraper's derived cut-off
+metrics are filled in row by row and
+written to the enriched CSV (with Arrow/Parquet copies) and the
+school-finder's CSV at the same time.
+
+With --delta, only schools the scraper's last delta file added or changed
+are enriched (and geocoded); the rest keep their previous enriched values.
+If the coordinates or HMT files changed since the previous output was
+written, every school is enriched again.
+"""
+
+import argparse
+import os
+from config import Config
+from enrichment import (
+    CoordinatesEnricher,
+    DerivedMetricsEnricher,
+    EnrichmentPipeline,
+    GenderEnricher,
+    HMTEnricher,
+    geocode_missing,
+    input_fingerprints,
+    load_input_fingerprints,
+    output_targets,
+    reusable_rows,
+    save_input_fingerprints,
+)
+from utils.columnar import stream_rows
+from utils.snapshot_diff import KEY_FIELD, delta_affected, load_delta
+from utils.sqlite_store import SchoolStore
+
+STEPS = ("gender", "coordinates", "hmt", "derived")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrich the schools CSV in a single pass")
+    parser.add_argument(
+        "input_csv",
+        nargs="?",
+        default=Config.OUTPUT_FILE,
+        help=f"Scraped CSV (or Arrow) file (default: {Config.OUTPUT_FILE})"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default=Config.ENRICHED_FILE,
+        help=f"Enriched CSV file, with Arrow/Parquet copies (default: {Config.ENRICHED_FILE})"
+    )
+    parser.add_argument(
+        "--frontend",
+        default=Config.FRONTEND_FILE,
+        help=f"CSV copy for the school-finder, written in the same pass (default: {Config.FRONTEND_FILE})"
+    )
+    parser.add_argument(
+        "--no-frontend",
+        action="store_true",
+        help="Don't write the school-finder copy"
+    )
+    parser.add_argument(
+        "--skip",
+        action="append",
+        choices=STEPS,
+        default=[],
+        help="Leave out an enrichment step (repeatable)"
+    )
+    parser.add_argument(
+        "-c", "--coords",
+        default=Config.COORDINATES_FILE,
+        help=f"Coordinates JSON file (default: {Config.COORDINATES_FILE})"
+    )
+    parser.add_argument(
+        "--hmt",
+        default=Config.HMT_FILE,
+        help=f"Higher mother tongue JSON file (default: {Config.HMT_FILE})"
+    )
+    parser.add_argument(
+        "--derived",
+        default=Config.DERIVED_FILE,
+        help=f"Derived metrics CSV written by the scraper (default: {Config.DERIVED_FILE})"
+    )
+    parser.add_argument(
+        "--geocode",
+        action="store_true",
+        help="Geocode new schools and changed addresses first"
+    )
+    parser.add_argument(
+        "--retry-missing",
+        action="store_true",
+        help="With --geocode, retry addresses that were previously not found"
+    )
+    parser.add_argument(
+        "--delta",
+        nargs="?",
+        const=Config.DELTA_FILE,
+        metavar="DELTA_FILE",
+        help="Only refresh schools added or changed in this delta file "
+        f"(default: {Config.DELTA_FILE}); use after changing only the scraped CSV"
+    )
+    parser.add_argument(
+        "--no-columnar",
+        action="store_true",
+        help="Only read and write CSV (skip the Arrow/Parquet copies)"
+    )
+    args = parser.parse_args()
+
+    if args.output.endswith(".arrow"):
+        parser.error("output must be a CSV path; Arrow and Parquet copies are written next to it")
+    columnar = not args.no_columnar
+
+    # Files whose contents end up in every row. The derived metrics are left out:
+    # they follow from each row's own scores, which reuse already compares.
+    inputs = {step: path for step, path in (("coordinates", args.coords), ("hmt", args.hmt)) if step not in args.skip}
+    affected = None
+    if args.delta:
+        delta = load_delta(args.delta)
+        affected = delta_affected(delta)
+        summary = delta["summary"]
+        print(
+            f"Delta {args.delta}: {summary['added']} added, {summary['removed']} removed, "
+            f"{summary['changed']} changed"
+        )
+        if load_input_fingerprints(args.output) != input_fingerprints(inputs):
+            print(f"Enrichment inputs changed since {args.output} was written; enriching every school")
+            affected = None
+
+    enrichers = []
+    if "gender" not in args.skip:
+        enrichers.append(GenderEnricher())
+    if "coordinates" not in args.skip:
+        if args.geocode:
+            # Only names and addresses are kept from this first read
+            with stream_rows(args.input_csv, columnar=columnar) as (_, rows):
+                if affected is not None:
+                    rows = (row for row in rows if row.get(KEY_FIELD) in affected)
+                enrichers.append(CoordinatesEnricher(geocode_missing(rows, args.coords, args.retry_missing)))
+        else:
+            enrichers.append(CoordinatesEnricher.from_file(args.coords))
+    if "hmt" not in args.skip:
+        enrichers.append(HMTEnricher.from_file(args.hmt))
+    if "derived" not in args.skip:
+        if args.derived and os.path.exists(args.derived):
+            enrichers.append(DerivedMetricsEnricher.from_file(args.derived))
+        else:
+            print(f"No derived metrics file ({args.derived or 'disabled'}); run the scraper to create it")
+
+    frontend = None if args.no_frontend else args.frontend
+    pipeline = EnrichmentPipeline(enrichers, output_targets(args.output, frontend, columnar=columnar))
+    reuse = reusable_rows(args.output, affected) if affected is not None else None
+    count = pipeline.run(args.input_csv, columnar=columnar, reuse=reuse)
+    save_input_fingerprints(args.output, input_fingerprints(inputs))
+
+    print(f"Processed {count} schools")
+    for line in pipeline.report():
+        print(line)
+    print(f"\n✓ Wrote {args.output}")
+    if frontend:
+        print(f"✓ Wrote {frontend}")
+    if Config.SQLITE_FILE:
+        save_to_store(enrichers, args.input_csv)
+
+
+def save_to_store(enrichers, source: str):
+    """Record the coordinates and HMT offerings used by this run in the SQLite store"""
+    with SchoolStore(Config.SQLITE_FILE) as store:
+        run_id = store.start_run("enrich", source)
+        for enricher in enrichers:
+            if isinstance(enricher, CoordinatesEnricher):
+                store.upsert_coordinates(enricher.coordinates, run_id)
+            elif isinstance(enricher, HMTEnricher):
+                store.replace_hmt_offerings(enricher.schools, run_id)
+        store.finish_run(run_id, "completed")
+    print(f"✓ Saved coordinates and HMT offerings to {Config.SQLITE_FILE} (run {run_id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+from enrichment.enrichers import (
+    Enricher,
+    CoordinatesEnricher,
+    HMTEnricher,
+    GenderEnricher,
+    geocode_missing,
+)
+from enrichment.derived import DerivedMetricsEnricher, derive_metrics, write_derived_metrics
+from enrichment.pipeline import (
+    CSVTarget,
+    EnrichmentPipeline,
+    input_fingerprints,
+    load_input_fingerprints,
+    output_targets,
+    reusable_rows,
+    save_input_fingerprints,
+)
+
@@ -0,0 +1,157 @@
+"""
+Derived cut-off metrics, computed for all schools at once with pandas and
+NumPy. They cover each posting group, with and without affiliation, over
+the years in the CSV:
+
+- <group>_Max / _Min: highest and lowest cut-off (what the school-finder's
+  "historical maximum" option uses)
+- <group>_YoY_<year>: change from the year before
+- <group>_Slope: least-squares trend, in AL points per year
+- <group>_Volatility: population standard deviation of the cut-offs
+
+Slope and volatility need at least two years of data. The metrics are
+written to their own CSV next to the scraped one and merged into the
+enriched outputs by DerivedMetricsEnricher, so consumers never recompute
+them from the score strings.
+"""
+
+import os
+import re
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from config import Config
+from enrichment.enrichers import Enricher, Row
+from models.cutoff import POSTING_GROUPS
+from utils.columnar import export_columnar
+
+KEY_COLUMNS = ("School Name", "Detail URL")
+MISSING = "-"
+
+_SCORE_COLUMN = re.compile(r"^(\d{4})_(IP|PG\d)(_Aff)?$")
+
+
+def score_years(columns: Iterable[str]) -> List[int]:
+    """Years with cut-off score columns, oldest first"""
+    return sorted({int(match.group(1)) for match in map(_SCORE_COLUMN.match, columns) if match})
+
+
+def numeric_scores(values: pd.Series, group: str) -> pd.Series:
+    """
+    A column of cut-off strings as numbers, with the semantics of
+    query.eligibility.extract_numeric_score: digits only, and for posting
+    groups a 3 or 4 digit run keeps its leading 1 or 2 digits.
+    """
+    digits = values.fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    if group != "IP":
+        lengths = digits.str.len()
+        digits = pd.Series(
+            np.select([lengths == 4, lengths == 3], [digits.str[:2], digits.str[:1]], default=digits),
+            index=values.index,
+        )
+    return pd.to_numeric(digits.mask(digits == ""), errors="coerce")
+
+
+def _trend(scores: np.ndarray, years: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Least-squares slope of each row over the years it has scores for"""
+    present = ~np.isnan(scores)
+    x = np.where(present, years - years.mean(), 0.0)  # Centred for precision
+    y = np.where(present, scores, 0.0)
+    sum_x, sum_y = x.sum(axis=1), y.sum(axis=1)
+    numerator = counts * (x * y).sum(axis=1) - sum_x * sum_y
+    denominator = counts * (x * x).sum(axis=1) - sum_x ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts >= 2, numerator / denominator, np.nan)
+
+
+def derive_metrics(frame: pd.DataFrame, years: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    """Key columns plus every derived metric column, one row per input row"""
+    years = sorted(years or score_years(frame.columns))
+    year_values = np.array(years, dtype=float)
+    derived = {key: frame[key] for key in KEY_COLUMNS if key in frame}
+
+    for group in POSTING_GROUPS:
+        for affiliated in (False, True):
+            prefix = f"{group}_Aff" if affiliated else group
+            columns = [f"{year}_{prefix}" for year in years]
+            if not any(column in frame for column in columns):
+                continue
+            scores = pd.DataFrame({
+                year: numeric_scores(frame[column], group) if column in frame else np.nan
+                for year, column in zip(years, columns)
+            }, index=frame.index)
+            counts = scores.notna().sum(axis=1).to_numpy()
+
+            derived[f"{prefix}_Max"] = scores.max(axis=1)
+            derived[f"{prefix}_Min"] = scores.min(axis=1)
+            for previous, year in zip(years, years[1:]):
+                derived[f"{prefix}_YoY_{year}"] = scores[year] - scores[previous]
+            derived[f"{prefix}_Slope"] = pd.Series(
+                _trend(scores.to_numpy(dtype=float), year_values, counts), index=frame.index
+            )
+            derived[f"{prefix}_Volatility"] = scores.std(axis=1, ddof=0).where(counts >= 2)
+
+    return pd.DataFrame(derived, index=frame.index)
+
+
+def format_metrics(derived: pd.DataFrame) -> pd.DataFrame:
+    """CSV text: whole numbers for scores and changes, floats to 3 decimals, "-" when missing"""
+    text = {}
+    for column in derived:
+        values = derived[column]
+        if column in KEY_COLUMNS:
+            text[column] = values
+        elif column.endswith(("_Slope", "_Volatility")):
+            text[column] = values.round(3).map(lambda v: MISSING if pd.isna(v) else repr(float(v)))
+        else:
+            text[column] = values.map(lambda v: MISSING if pd.isna(v) else str(int(v)))
+    return pd.DataFrame(text, index=derived.index)
+
+
+def write_derived_metrics(
+    input_csv: str = Config.OUTPUT_FILE,
+    output_csv: str = Config.DERIVED_FILE,
+    columnar: bool = Config.COLUMNAR_EXPORT,
+) -> int:
+    """Compute the metrics for a schools CSV and write them (atomically) to output_csv; returns the row count"""
+    frame = pd.read_csv(input_csv, dtype=str, keep_default_na=False)
+    metrics = format_metrics(derive_metrics(frame))
+
+    directory = os.path.dirname(output_csv)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial_path = f"{output_csv}.partial"
+    metrics.to_csv(partial_path, index=False)
+    os.replace(partial_path, output_csv)
+    if columnar:
+        export_columnar(output_csv, list(metrics.columns), metrics.to_dict("records"))
+    return len(metrics)
+
+
+class DerivedMetricsEnricher(Enricher):
+    """Derived metric columns from the metrics CSV, by detail URL"""
+
+    def __init__(self, metrics: pd.DataFrame):
+        self.columns = tuple(column for column in metrics.columns if column not in KEY_COLUMNS)
+        self.metrics = metrics.set_index("Detail URL")[list(self.columns)].to_dict("index")
+        self.matched = 0
+        self.unmatched: List[str] = []
+
+    @classmethod
+    def from_file(cls, metrics_file: str = Config.DERIVED_FILE) -> "DerivedMetricsEnricher":
+        return cls(pd.read_csv(metrics_file, dtype=str, keep_default_na=False))
+
+    def enrich(self, row: Row):
+        values = self.metrics.get(row.get("Detail URL", ""))
+        if values is None:
+            self.unmatched.append(row.get("School Name", ""))
+            values = {}
+        else:
+            self.matched += 1
+        for column in self.columns:
+            row[column] = values.get(column, MISSING)
+
+    def report(self) -> List[str]:
+        lines = [f"Derived metrics: {len(self.columns)} columns, {self.matched} schools matched"]
+        lines += [f"  - no metrics for {name}" for name in self.unmatched]
+        return lines
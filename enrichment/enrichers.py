@@ -0,0 +1,127 @@
+"""
+Enrichers add or fill columns of one schools CSV row at a time. Each
+loads its reference data once, so the pipeline can stream rows through
+any combination of them in a single pass.
+"""
+
+import json
+from typing import Dict, Iterable, List, Tuple
+from config import Config
+from models.school import derive_gender
+from utils.geocoder import BatchGeocoder, update_school_coordinates
+
+Row = Dict[str, str]
+
+# HMT CSV column -> key in higher_mother_tongue.json
+HMT_LANGUAGES = {
+    "HCL": "higher_chinese_language",
+    "HTL": "higher_tamil_language",
+    "HML": "higher_malay_language",
+}
+
+
+class Enricher:
+    """One enrichment step: adds ``columns`` (if missing) and fills them in each row"""
+
+    columns: Tuple[str, ...] = ()
+
+    def enrich(self, row: Row):
+        raise NotImplementedError
+
+    def report(self) -> List[str]:
+        """Summary lines printed after the run"""
+        return []
+
+
+class CoordinatesEnricher(Enricher):
+    """Latitude and Longitude from the school coordinates file, by school name"""
+
+    columns = ("Latitude", "Longitude")
+
+    def __init__(self, coordinates: Dict[str, dict]):
+        self.coordinates = coordinates
+        self.matched = 0
+        self.unmatched: List[str] = []
+
+    @classmethod
+    def from_file(cls, coords_file: str = Config.COORDINATES_FILE) -> "CoordinatesEnricher":
+        with open(coords_file, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def enrich(self, row: Row):
+        school_name = row.get("School Name", "")
+        entry = self.coordinates.get(school_name)
+        if entry:
+            row["Latitude"] = str(entry["latitude"])
+            row["Longitude"] = str(entry["longitude"])
+            self.matched += 1
+        else:
+            row["Latitude"] = ""
+            row["Longitude"] = ""
+            self.unmatched.append(school_name)
+
+    def report(self) -> List[str]:
+        lines = [f"Coordinates: {self.matched} matched, {len(self.unmatched)} unmatched"]
+        lines += [f"  - {name}" for name in self.unmatched]
+        return lines
+
+
+def geocode_missing(rows: Iterable[Row], coords_file: str, retry_missing: bool = False) -> Dict[str, dict]:
+    """Geocode schools without coordinates for their current address; returns all coordinates."""
+    schools = {row.get("School Name", ""): row.get("Address", "") for row in rows}
+    batch_geocoder = BatchGeocoder(retry_missing=retry_missing)
+    try:
+        coordinates = update_school_coordinates(schools, coords_file, batch_geocoder)
+    finally:
+        batch_geocoder.close()
+
+    stats = batch_geocoder.stats
+    print(
+        f"Geocoding: {stats['cached']} from cache, {stats['geocoded']} geocoded, "
+        f"{stats['not_found']} not found, {stats['failed']} failed"
+    )
+    return coordinates
+
+
+class HMTEnricher(Enricher):
+    """HCL, HTL and HML flags ("Y" or "-") from the higher mother tongue lists"""
+
+    columns = tuple(HMT_LANGUAGES)
+
+    def __init__(self, hmt_data: Dict[str, List[str]]):
+        self.schools = {column: set(hmt_data.get(key, ())) for column, key in HMT_LANGUAGES.items()}
+        self.counts = dict.fromkeys(HMT_LANGUAGES, 0)
+
+    @classmethod
+    def from_file(cls, hmt_file: str = Config.HMT_FILE) -> "HMTEnricher":
+        with open(hmt_file, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def enrich(self, row: Row):
+        school_name = row.get("School Name", "")
+        for column, schools in self.schools.items():
+            offered = school_name in schools
+            row[column] = "Y" if offered else "-"
+            self.counts[column] += offered
+
+    def report(self) -> List[str]:
+        return ["Higher mother tongue matches:"] + [
+            f"  - {column}: {self.counts[column]}/{len(schools)}" for column, schools in self.schools.items()
+        ]
+
+
+class GenderEnricher(Enricher):
+    """Gender derived from the school name, where the row has none"""
+
+    columns = ("Gender",)
+
+    def __init__(self):
+        self.derived = 0
+
+    def enrich(self, row: Row):
+        if row.get("Gender") in (None, "", "N/A"):
+            row["Gender"] = derive_gender(row.get("School Name", ""))
+            self.derived += 1
+
+    def report(self) -> List[str]:
+        return [f"Gender: derived for {self.derived} schools"]
@@ -0,0 +1,192 @@
+"""
+Single-pass enrichment: each row of the input is read once, passed
+through every enricher and appended to every output target, so memory
+stays at one row (one record batch for columnar copies) however many
+stages and outputs there are.
+
+Given a snapshot delta, rows the delta didn't touch copy their enriched
+columns from the previous output instead of being enriched again. That
+is only valid while the enrichers' input files are the ones the previous
+output was built from, so their fingerprints are kept next to it.
+"""
+
+import csv
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+from config import Config
+from enrichment.enrichers import Enricher, Row
+from utils.columnar import ColumnarWriter, stream_rows
+from utils.snapshot_diff import IGNORED_FIELDS, KEY_FIELD, load_snapshot
+
+
+class CSVTarget:
+    """
+    Streams rows to <path>.partial and renames it over path on commit, so
+    readers never see a half-written file. With columnar set, Arrow and
+    Parquet copies are streamed alongside.
+    """
+
+    def __init__(self, path: str, columnar: bool = False, flush_every: int = Config.CSV_FLUSH_EVERY):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.flush_every = max(1, flush_every)
+        self.columnar = ColumnarWriter(path) if columnar else None
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def open(self, fieldnames: List[str]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.partial_path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+        if self.columnar:
+            self.columnar.open(fieldnames)
+
+    def append(self, row: Dict[str, str]):
+        self._writer.writerow(row)
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self._file.flush()
+        if self.columnar:
+            self.columnar.append(row)
+
+    def commit(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.partial_path, self.path)
+        if self.columnar:
+            self.columnar.commit()
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.close()
+        if self.columnar:
+            self.columnar.close()
+
+
+class EnrichmentPipeline:
+    """Streams a schools CSV (or its Arrow copy) through enrichers into one or more targets"""
+
+    def __init__(self, enrichers: Sequence[Enricher], targets: Sequence[CSVTarget]):
+        if not targets:
+            raise ValueError("EnrichmentPipeline needs at least one output target")
+        self.enrichers = list(enrichers)
+        self.targets = list(targets)
+        self.reused = 0
+
+    def fieldnames(self, input_fieldnames: List[str]) -> List[str]:
+        """Input header plus each enricher's columns, without duplicates"""
+        columns = list(input_fieldnames) + [c for enricher in self.enrichers for c in enricher.columns]
+        return list(dict.fromkeys(columns))
+
+    def run(
+        self,
+        input_path: str,
+        columnar: bool = Config.COLUMNAR_EXPORT,
+        reuse: Optional[Dict[str, Row]] = None,
+    ) -> int:
+        """
+        Enrich every row of input_path; returns the number of rows written.
+        Rows in ``reuse`` (earlier output rows by detail URL, see
+        reusable_rows) whose scraped fields are unchanged keep that row's
+        enriched columns.
+        """
+        count = 0
+        enriched_columns = list(dict.fromkeys(c for enricher in self.enrichers for c in enricher.columns))
+        try:
+            with stream_rows(input_path, columnar=columnar) as (input_fieldnames, rows):
+                fieldnames = self.fieldnames(input_fieldnames)
+                for target in self.targets:
+                    target.open(fieldnames)
+                for row in rows:
+                    previous = reuse.get(row.get(KEY_FIELD)) if reuse else None
+                    if previous is not None and _same_source(previous, row, enriched_columns):
+                        for column in enriched_columns:
+                            row[column] = previous.get(column, "")
+                        self.reused += 1
+                    else:
+                        for enricher in self.enrichers:
+                            enricher.enrich(row)
+                    for target in self.targets:
+                        target.append(row)
+                    count += 1
+            # Input fully read: safe to replace it if it is also an output
+            for target in self.targets:
+                target.commit()
+        finally:
+            for target in self.targets:
+                target.close()
+        return count
+
+    def report(self) -> List[str]:
+        lines = [f"Reused enrichment of {self.reused} unchanged schools"] if self.reused else []
+        return lines + [line for enricher in self.enrichers for line in enricher.report()]
+
+
+def _same_source(previous: Row, row: Row, enriched_columns: List[str]) -> bool:
+    """Whether an earlier output row was enriched from the same scraped values as row"""
+    skip = set(IGNORED_FIELDS) | set(enriched_columns)
+    return all((previous.get(name) or "") == (value or "") for name, value in row.items() if name not in skip)
+
+
+def reusable_rows(output_path: str, affected: Set[str]) -> Dict[str, Row]:
+    """
+    Rows of an earlier enriched CSV that a delta did not add or change, by
+    detail URL. Each is still checked against its input row before reuse,
+    so a stale delta costs a re-enrichment, not wrong data.
+    """
+    _, rows = load_snapshot(output_path)
+    return {key: row for key, row in rows.items() if key not in affected}
+
+
+def input_fingerprints(inputs: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """SHA-256 of each enrichment step's input file, by step (None if the file is missing)"""
+    fingerprints = {}
+    for step, path in inputs.items():
+        try:
+            with open(path, "rb") as f:
+                fingerprints[step] = hashlib.file_digest(f, "sha256").hexdigest()
+        except OSError:
+            fingerprints[step] = None
+    return fingerprints
+
+
+def _fingerprints_path(output_path: str) -> str:
+    return str(Path(output_path).with_suffix(".inputs.json"))
+
+
+def load_input_fingerprints(output_path: str) -> Optional[Dict[str, Optional[str]]]:
+    """Fingerprints saved with an enriched CSV, or None if there are none"""
+    try:
+        with open(_fingerprints_path(output_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_input_fingerprints(output_path: str, fingerprints: Dict[str, Optional[str]]):
+    """Record the inputs an enriched CSV was built from (atomically)"""
+    path = _fingerprints_path(output_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def output_targets(
+    output_csv: str,
+    frontend_csv: Optional[str] = None,
+    columnar: bool = Config.COLUMNAR_EXPORT,
+) -> List[CSVTarget]:
+    """The enriched CSV (with columnar copies) and optionally the frontend's CSV-only copy"""
+    targets = [CSVTarget(output_csv, columnar=columnar)]
+    if frontend_csv and frontend_csv != output_csv:
+        targets.append(CSVTarget(frontend_csv))
+    return targets
@@ -1,74 +1,34 @@
 #!/usr/bin/env python3
 """
 Fix school names in higher_mother_tongue.json to match coord.csv naming convention.
+
+Confident matches are remembered in data/name_matches.json, so reruns only
+score new names. Uncertain matches are listed with their confidence; run
+with --confirm-uncertain to accept them as shown.
 """
 
-import csv
 import json
-from difflib import SequenceMatcher
+import sys
+from config import Config
+from utils.columnar import load_rows
+from utils.name_matcher import NameMatcher
 
-# Read coord.csv school names
-coord_schools = set()
-with open("data/coord.csv", "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        coord_schools.add(row["School Name"])
+# Read the enriched CSV's school names (or its memory-mapped Arrow copy, if current)
+_, coord_rows = load_rows(Config.ENRICHED_FILE, columnar=Config.COLUMNAR_EXPORT)
+coord_schools = {row["School Name"] for row in coord_rows}
 
-print(f"Found {len(coord_schools)} schools in coord.csv")
+print(f"Found {len(coord_schools)} schools in {Config.ENRICHED_FILE}")
 
-# Read higher_mother_tongue.json
-with open("data/higher_mother_tongue.json", "r", encoding="utf-8") as f:
+# Read the higher mother tongue lists
+with open(Config.HMT_FILE, "r", encoding="utf-8") as f:
     hmt_data = json.load(f)
 
-# Build name mapping from MOE to coord.csv format
-def normalize_name(name):
-    """Normalize school name for comparison."""
-    name = name.lower()
-    # Remove common suffixes and variations
-    replacements = [
-        ("secondary school", ""),
-        ("(secondary)", ""),
-        (" secondary", ""),
-        ("school", ""),
-        ("'s", "s"),
-        ("'", "'"),
-        ("  ", " "),
-    ]
-    for old, new in replacements:
-        name = name.replace(old, new)
-    return name.strip()
-
-def find_best_match(moe_name, coord_schools):
-    """Find the best matching name in coord.csv."""
-    moe_norm = normalize_name(moe_name)
-
-    best_match = None
-    best_score = 0
-
-    for coord_name in coord_schools:
-        coord_norm = normalize_name(coord_name)
-
-        # Exact match after normalization
-        if moe_norm == coord_norm:
-            return coord_name
-
-        # Check if one contains the other
-        if moe_norm in coord_norm or coord_norm in moe_norm:
-            score = SequenceMatcher(None, moe_norm, coord_norm).ratio()
-            if score > best_score:
-                best_score = score
-                best_match = coord_name
-        else:
-            score = SequenceMatcher(None, moe_norm, coord_norm).ratio()
-            if score > best_score and score > 0.6:
-                best_score = score
-                best_match = coord_name
-
-    return best_match
-
 # Create mapping
+matcher = NameMatcher(coord_schools)
+confirm_uncertain = "--confirm-uncertain" in sys.argv[1:]
 name_mapping = {}
 unmatched = []
+uncertain = []
 
 all_moe_names = set()
 for lang in hmt_data:
@@ -77,16 +37,29 @@ for lang in hmt_data:
 print(f"\nMapping {len(all_moe_names)} unique MOE school names...")
 
 for moe_name in sorted(all_moe_names):
-    match = find_best_match(moe_name, coord_schools)
+    result = matcher.match(moe_name)
+    match = result.match
     if match:
         name_mapping[moe_name] = match
+        if result.uncertain:
+            uncertain.append(result)
+            if confirm_uncertain:
+                matcher.confirm(result)
         if moe_name != match:
-            print(f"  '{moe_name}' -> '{match}'")
+            confidence = f" (confidence {result.score:.2f}, next best {result.runner_up:.2f})" if result.uncertain else ""
+            print(f"  '{moe_name}' -> '{match}'{confidence}")
     else:
         unmatched.append(moe_name)
         print(f"  WARNING: No match for '{moe_name}'")
 
+matcher.save()
+
 print(f"\nMatched: {len(name_mapping)}, Unmatched: {len(unmatched)}")
+if uncertain:
+    action = "confirmed" if confirm_uncertain else "check these, then rerun with --confirm-uncertain to accept them"
+    print(f"Uncertain: {len(uncertain)} ({action})")
+    for result in uncertain:
+        print(f"  {result.score:.2f}  '{result.name}' -> '{result.match}'")
 
 # Apply mapping to the data
 fixed_data = {}
@@ -109,16 +82,16 @@ if "Nanyang Girls' High" not in fixed_data["higher_chinese_language"]:
     print("\nAdded 'Nanyang Girls' High' to higher_chinese_language")
 
 # Save fixed data
-with open("data/higher_mother_tongue.json", "w", encoding="utf-8") as f:
+with open(Config.HMT_FILE, "w", encoding="utf-8") as f:
     json.dump(fixed_data, f, indent=2, ensure_ascii=False)
 
-print(f"\n✓ Fixed data saved to data/higher_mother_tongue.json")
+print(f"\n✓ Fixed data saved to {Config.HMT_FILE}")
 print(f"  - Higher Chinese Language: {len(fixed_data['higher_chinese_language'])} schools")
 print(f"  - Higher Tamil Language: {len(fixed_data['higher_tamil_language'])} schools")
 print(f"  - Higher Malay Language: {len(fixed_data['higher_malay_language'])} schools")
 
 # Report schools in HMT but not in coord.csv
-print("\n--- Schools in HMT data but NOT in coord.csv ---")
+print(f"\n--- Schools in HMT data but NOT in {Config.ENRICHED_FILE} ---")
 for lang, schools in fixed_data.items():
     for school in schools:
         if school not in coord_schools:
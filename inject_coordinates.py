@@ -1,72 +1,55 @@
 #!/usr/bin/env python3
 """
 Inject latitude and longitude coordinates into a schools CSV file
-using pre-cached coordinate data.
+using pre-cached coordinate data, optionally geocoding schools that are
+new or whose address changed first.
 """
 
-import csv
-import json
 import argparse
-from pathlib import Path
-
-
-def load_coordinates(coords_file: str) -> dict:
-    """Load school coordinates from JSON file."""
-    with open(coords_file, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def inject_coordinates(input_csv: str, output_csv: str, coords_file: str):
+from config import Config
+from enrichment import CoordinatesEnricher, EnrichmentPipeline, geocode_missing, output_targets
+from utils.columnar import stream_rows
+
+
+def inject_coordinates(
+    input_csv: str,
+    output_csv: str,
+    coords_file: str,
+    columnar: bool = Config.COLUMNAR_EXPORT,
+    geocode: bool = False,
+    retry_missing: bool = False,
+):
     """
     Read input CSV, add Latitude and Longitude columns, write to output CSV.
 
+    Rows are streamed through a CoordinatesEnricher one at a time.
+
     Args:
-        input_csv: Path to input CSV file (without coordinates)
+        input_csv: Path to input CSV file (without coordinates), or an Arrow file
         output_csv: Path to output CSV file (with coordinates)
         coords_file: Path to JSON file with school coordinates
+        columnar: Read a fresh Arrow copy of the input if there is one, and
+            write Arrow and Parquet copies of the output
+        geocode: First geocode schools that are new or whose address changed,
+            updating coords_file
+        retry_missing: With geocode, retry addresses previously not found
     """
-    coordinates = load_coordinates(coords_file)
-
-    with open(input_csv, "r", encoding="utf-8") as infile:
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames.copy()
-
-        # Add Latitude and Longitude columns if not present
-        if "Latitude" not in fieldnames:
-            fieldnames.append("Latitude")
-        if "Longitude" not in fieldnames:
-            fieldnames.append("Longitude")
-
-        rows = []
-        matched = 0
-        unmatched = []
-
-        for row in reader:
-            school_name = row.get("School Name", "")
-
-            if school_name in coordinates:
-                row["Latitude"] = coordinates[school_name]["latitude"]
-                row["Longitude"] = coordinates[school_name]["longitude"]
-                matched += 1
-            else:
-                row["Latitude"] = ""
-                row["Longitude"] = ""
-                unmatched.append(school_name)
-
-            rows.append(row)
-
-    with open(output_csv, "w", encoding="utf-8", newline="") as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"Processed {len(rows)} schools")
-    print(f"  Matched: {matched}")
-    print(f"  Unmatched: {len(unmatched)}")
-
-    if unmatched:
+    if geocode:
+        with stream_rows(input_csv, columnar=columnar) as (_, rows):
+            enricher = CoordinatesEnricher(geocode_missing(rows, coords_file, retry_missing))
+    else:
+        enricher = CoordinatesEnricher.from_file(coords_file)
+
+    pipeline = EnrichmentPipeline([enricher], output_targets(output_csv, columnar=columnar))
+    count = pipeline.run(input_csv, columnar=columnar)
+
+    print(f"Processed {count} schools")
+    print(f"  Matched: {enricher.matched}")
+    print(f"  Unmatched: {len(enricher.unmatched)}")
+
+    if enricher.unmatched:
         print("\nUnmatched schools:")
-        for name in unmatched:
+        for name in enricher.unmatched:
             print(f"  - {name}")
 
 
@@ -82,17 +65,42 @@ def main():
         "-o", "--output",
         help="Output CSV file path (default: overwrites input file)"
     )
+    parser.add_argument(
+        "--no-columnar",
+        action="store_true",
+        help="Only read and write CSV (skip the Arrow/Parquet copies)"
+    )
     parser.add_argument(
         "-c", "--coords",
-        default="data/school_coordinates.json",
-        help="Path to coordinates JSON file (default: data/school_coordinates.json)"
+        default=Config.COORDINATES_FILE,
+        help=f"Path to coordinates JSON file (default: {Config.COORDINATES_FILE})"
+    )
+    parser.add_argument(
+        "--geocode",
+        action="store_true",
+        help=f"Geocode new schools and changed addresses first (cached in {Config.GEOCODE_CACHE})"
+    )
+    parser.add_argument(
+        "--retry-missing",
+        action="store_true",
+        help="With --geocode, retry addresses that were previously not found"
     )
 
     args = parser.parse_args()
 
     output_csv = args.output if args.output else args.input_csv
 
-    inject_coordinates(args.input_csv, output_csv, args.coords)
+    if output_csv.endswith(".arrow"):
+        parser.error("output must be a CSV path; Arrow and Parquet copies are written next to it")
+
+    inject_coordinates(
+        args.input_csv,
+        output_csv,
+        args.coords,
+        columnar=not args.no_columnar,
+        geocode=args.geocode,
+        retry_missing=args.retry_missing,
+    )
     print(f"\nOutput written to: {output_csv}")
 
 
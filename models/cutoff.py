@@ -0,0 +1,215 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+import re
+
+# Score with optional HCL grade, e.g. "7", "6M", "22"
+_SCORE = re.compile(r'^(\d{1,2})([DMP])?$', re.IGNORECASE)
+# Leading score of a range bound, e.g. "22" in "22", "8M" in "8M"
+_LEADING_SCORE = re.compile(r'^(\d+)([DMP])?', re.IGNORECASE)
+_FULL_SCORE = re.compile(r'^(\d+)([DMP])?$', re.IGNORECASE)
+# Main score with no affiliated value, e.g. "7-" or "7M-"
+_TRAILING_DASH = re.compile(r'^(\d{1,2})([DMP])?-$', re.IGNORECASE)
+# Concatenated main score with grade followed by more digits, e.g. "6M8M"
+_GRADED_PAIR = re.compile(r'^(\d{1,2})([DMP])(\d+)', re.IGNORECASE)
+_GRADED_AFFILIATED = re.compile(r'^\d{1,2}[DMP](\d{1,2})([DMP])?$', re.IGNORECASE)
+# "5 - 9M8M- 12" -> "5 - 9M8M - 12"
+_LOOSE_SEPARATOR = re.compile(r'(?<!\s)-\s')
+
+_EMPTY_VALUES = ("", "-", "--")
+
+
+@dataclass(frozen=True)
+class CutoffBound:
+    """One end of a cut-off range: AL score (as scraped) and optional HCL grade (D/M/P)"""
+
+    score: str
+    grade: Optional[str] = None
+
+    def as_tuple(self) -> Tuple[Optional[str], Optional[str]]:
+        return (self.score, self.grade)
+
+
+@dataclass(frozen=True)
+class CutoffCell:
+    """
+    Structured contents of one cut-off table cell.
+
+    Cells hold a main (non-affiliated) range and, for schools with
+    affiliated primaries, an affiliated range. Single-value cells only set
+    the upper bounds, which are the cut-off points.
+    """
+
+    main_min: Optional[CutoffBound] = None
+    main_max: Optional[CutoffBound] = None
+    affiliated_min: Optional[CutoffBound] = None
+    affiliated_max: Optional[CutoffBound] = None
+
+    @property
+    def main(self) -> Tuple[Optional[str], Optional[str]]:
+        """(score, hcl_grade) cut-off for non-affiliated students"""
+        return self.main_max.as_tuple() if self.main_max else (None, None)
+
+    @property
+    def affiliated(self) -> Tuple[Optional[str], Optional[str]]:
+        """(score, hcl_grade) cut-off for affiliated students"""
+        return self.affiliated_max.as_tuple() if self.affiliated_max else (None, None)
+
+
+EMPTY_CELL = CutoffCell()
+
+
+def _bound(match) -> CutoffBound:
+    grade = match.group(2)
+    return CutoffBound(match.group(1), grade.upper() if grade else None)
+
+
+def _parse_pair(token: str) -> Tuple[Optional[CutoffBound], Optional[CutoffBound]]:
+    """
+    Parse a cell without ranges: a main score optionally followed by the
+    affiliated score, e.g. "8", "6M", "7M-", "6M8M", "6M 8M", "713", "2125".
+    """
+    parts = token.split()
+    if not parts:
+        return None, None
+    first = parts[0]
+
+    # Space-separated "6M 8M": second value is affiliated
+    affiliated = None
+    if len(parts) >= 2:
+        match = _SCORE.match(parts[1])
+        affiliated = _bound(match) if match else CutoffBound(parts[1])
+
+    # "7-" or "7M-": dash means no affiliated value
+    match = _TRAILING_DASH.match(first)
+    if match:
+        return _bound(match), affiliated
+
+    # "6M8M": score and grade followed by the affiliated score
+    match = _GRADED_PAIR.match(first)
+    if match:
+        if affiliated is None:
+            aff_match = _GRADED_AFFILIATED.match(first)
+            affiliated = (
+                CutoffBound(aff_match.group(1), aff_match.group(2).upper() if aff_match.group(2) else None)
+                if aff_match
+                else None
+            )
+        return _bound(match), affiliated
+
+    # "713" (7 + 13) or "2125" (21 + 25): concatenated without grades
+    if first.isdigit() and len(first) in (3, 4):
+        split = len(first) - 2
+        return CutoffBound(first[:split]), affiliated or CutoffBound(first[split:])
+
+    match = _SCORE.match(first)
+    if match:
+        return _bound(match), affiliated
+
+    # Unrecognised: keep as-is with no grade
+    return CutoffBound(first), affiliated
+
+
+def _split_combined(combined: str, main_min: Optional[int], affiliated_max: Optional[int]):
+    """
+    Split the middle of "5 - 910 - 22", where the main range's upper bound
+    runs into the affiliated range's lower bound ("9" + "10").
+
+    Takes the first split point giving a main range that is not inverted
+    and an affiliated lower bound without a leading zero that does not
+    exceed the affiliated upper bound.
+    """
+    for split in range(1, len(combined)):
+        main_match = _FULL_SCORE.match(combined[:split])
+        aff_match = _FULL_SCORE.match(combined[split:]) or _LEADING_SCORE.match(combined[split:])
+        if not (main_match and aff_match):
+            continue
+
+        aff_digits = aff_match.group(1)
+        if aff_digits.startswith("0"):
+            continue
+        if main_min is not None and int(main_match.group(1)) < main_min:
+            continue
+        if affiliated_max is not None and int(aff_digits) > affiliated_max:
+            continue
+        return _bound(main_match), _bound(aff_match)
+
+    # Fallback: leading score is the main upper bound
+    match = _LEADING_SCORE.match(combined)
+    return (_bound(match) if match else None), None
+
+
+@lru_cache(maxsize=4096)
+def parse_cutoff_cell(raw: Optional[str]) -> CutoffCell:
+    """
+    Parse a raw cut-off cell into main and affiliated ranges.
+
+    Formats:
+    - "8", "6M", "7M-"         -> main cut-off only
+    - "6M8M", "6M 8M", "713"   -> main cut-off followed by affiliated cut-off
+    - "12 - 16", "6M- 8M"      -> main range
+    - "5 - 910 - 22"           -> main range 5-9, affiliated range 10-22
+    - "5 - 9M8M- 12"           -> main range 5-9M, affiliated range 8M-12
+
+    Results are memoized on the raw string, so repeated cells across the
+    main page and detail pages are only parsed once.
+    """
+    if raw is None:
+        return EMPTY_CELL
+    cleaned = raw.strip()
+    if cleaned in _EMPTY_VALUES:
+        return EMPTY_CELL
+
+    parts = _LOOSE_SEPARATOR.sub(' - ', cleaned).split(' - ')
+
+    if len(parts) >= 3:
+        # main_min - main_max+aff_min - aff_max
+        min_match = _LEADING_SCORE.match(parts[0])
+        max_match = _LEADING_SCORE.match(parts[-1])
+        main_min = _bound(min_match) if min_match else None
+        affiliated_max = _bound(max_match) if max_match else None
+        main_max, affiliated_min = _split_combined(
+            parts[1],
+            int(main_min.score) if main_min else None,
+            int(affiliated_max.score) if affiliated_max else None,
+        )
+        return CutoffCell(main_min, main_max, affiliated_min, affiliated_max)
+
+    if len(parts) == 2:
+        # main_min - main_max, where the upper bound may carry an affiliated value
+        min_match = _LEADING_SCORE.match(parts[0])
+        main_max, affiliated_max = _parse_pair(parts[1])
+        return CutoffCell(_bound(min_match) if min_match else None, main_max, None, affiliated_max)
+
+    main_max, affiliated_max = _parse_pair(cleaned)
+    return CutoffCell(None, main_max, None, affiliated_max)
+
+
+# Posting groups in export order
+POSTING_GROUPS = ("IP", "PG3", "PG2", "PG1")
+
+
+@dataclass(frozen=True, slots=True)
+class CutoffRecord:
+    """
+    One cut-off point in long format: a school's score (and HCL grade) for
+    one year, posting group and affiliation status.
+    """
+
+    year: int
+    group: str  # One of POSTING_GROUPS
+    affiliated: bool
+    score: Optional[str]
+    grade: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[int, str, bool]:
+        return (self.year, self.group, self.affiliated)
+
+    @classmethod
+    def from_cell(cls, year: int, group: str, affiliated: bool, cell: CutoffCell) -> Optional["CutoffRecord"]:
+        """Record for the main or affiliated value of a parsed cell, or None if the cell has none"""
+        score, grade = cell.affiliated if affiliated else cell.main
+        if score is None:
+            return None
+        return cls(year, group, affiliated, score, grade)
@@ -1 +1,19 @@
 # Parsers package
+from parsers.detail_page_parser import DetailPageParser
+from parsers.lxml_detail_page_parser import LxmlDetailPageParser
+
+# Interchangeable detail page parser implementations, selected by name
+DETAIL_PARSER_BACKENDS = {
+    "bs4": DetailPageParser,
+    "lxml": LxmlDetailPageParser,
+}
+
+
+def get_detail_parser(backend: str):
+    """Return the detail page parser class for a backend name"""
+    try:
+        return DETAIL_PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown parser backend '{backend}' (choose from {', '.join(DETAIL_PARSER_BACKENDS)})"
+        )
@@ -0,0 +1,79 @@
+from lxml import etree
+from typing import Tuple, Optional, Dict, List
+from models.cutoff import CutoffRecord
+from parsers.detail_page_parser import DetailPageParser
+
+# Compiled once and shared by every parser instance
+_TABLES = etree.XPath("//table")
+_ROWS = etree.XPath(".//tr")
+_TBODY = etree.XPath("(.//tbody)[1]")
+_HEADERS = etree.XPath(".//th | .//columnheader")
+_LABEL_CELLS = etree.XPath(".//td | .//th | .//cell")
+_DATA_CELLS = etree.XPath(".//td | .//cell")
+# Text nodes BeautifulSoup's get_text() keeps: not inside script, style or template elements
+_TEXT = etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+
+_FIELDS = ("town", "address")
+
+
+def _text(element) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True)"""
+    return "".join(part.strip() for part in _TEXT(element))
+
+
+class LxmlDetailPageParser(DetailPageParser):
+    """
+    Detail page parser backed by lxml and compiled XPath.
+
+    Produces the same (town, address, history) as DetailPageParser,
+    but collects all three in a single pass over the page's tables instead
+    of walking every table once per field.
+    """
+
+    def __init__(self, html_content: str):
+        if isinstance(html_content, str):
+            html_content = html_content.encode("utf-8")
+        try:
+            self.root = etree.fromstring(html_content, etree.HTMLParser(encoding="utf-8"))
+        except etree.XMLSyntaxError:
+            self.root = None  # Empty document
+
+    def parse(
+        self,
+    ) -> Tuple[Optional[str], Optional[str], List[CutoffRecord]]:
+        """Extract town, address, and historical cut-off points in one traversal"""
+        fields: Dict[str, Optional[str]] = {}
+        historical_data: Dict[int, List[CutoffRecord]] = {}
+        found_history = False
+
+        if self.root is None:
+            return None, None, []
+
+        for table in _TABLES(self.root):
+            # School Info fields: first "label | value" row per field wins
+            if len(fields) < len(_FIELDS):
+                for row in _ROWS(table):
+                    cells = _LABEL_CELLS(row)
+                    if len(cells) >= 2:
+                        label = _text(cells[0]).lower()
+                        if label in _FIELDS and label not in fields:
+                            fields[label] = _text(cells[1])
+
+            # PSLE AL Range History: first table with Year and IP headers
+            if not found_history:
+                header_text = {_text(h) for h in _HEADERS(table)}
+                if "Year" in header_text and "IP" in header_text:
+                    found_history = True
+                    tbody = _TBODY(table)
+                    rows = _ROWS(tbody[0]) if tbody else _ROWS(table)[1:]  # Skip header
+                    for row in rows:
+                        cells = _DATA_CELLS(row)
+                        if len(cells) >= 5:
+                            self._parse_history_row(
+                                historical_data, [_text(c) for c in cells[:5]]
+                            )
+
+            if found_history and len(fields) == len(_FIELDS):
+                break
+
+        return fields.get("town"), fields.get("address"), self._flatten_history(historical_data)
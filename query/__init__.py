@@ -0,0 +1,8 @@
+from query.eligibility import (
+    EligibilityQuery,
+    eligible_groups,
+    extract_numeric_score,
+    column_name,
+    scan,
+)
+from query.engine import SchoolQueryEngine
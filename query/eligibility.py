@@ -0,0 +1,117 @@
+"""
+Eligibility rules of the school-finder frontend (school-finder/src/App.jsx),
+ported to Python with the same semantics. scan() is the row-by-row
+reference filter; SchoolQueryEngine answers the same queries from indexes.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from query.spatial import Point, geo_distance, school_location
+
+MAX_AL = 30
+GENDERS = ("all", "mixed", "boys", "girls")
+SORT_ORDERS = ("name", "distance")
+MOTHER_TONGUES = ("ML", "TL", "HCL", "HML", "HTL")
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def eligible_groups(score: int) -> Tuple[str, ...]:
+    """Posting groups open to a PSLE AL score (MOE official mappings), as getEligibleGroups"""
+    if score <= 20:
+        return ("PG3", "IP")  # G3 + IP eligible
+    if score <= 22:
+        return ("PG2", "PG3")  # G2 or G3
+    if score <= 24:
+        return ("PG2",)  # G2 only
+    if score == 25:
+        return ("PG1", "PG2")  # G1 or G2
+    return ("PG1",)  # 26-30: G1 only
+
+
+def extract_numeric_score(value: Optional[str], group: str) -> Optional[int]:
+    """
+    Numeric cut-off from a CSV cell, as extractNumericScore: digits only,
+    and for posting groups a 3 or 4 digit run is a concatenated
+    "main + affiliated" value whose leading 1 or 2 digits are the cut-off.
+    """
+    if not value or value in ("-", "--"):
+        return None
+    digits = _NON_DIGITS.sub("", value)
+    if not digits:
+        return None
+
+    if group != "IP":
+        if len(digits) == 4:
+            return int(digits[:2])
+        if len(digits) == 3:
+            return int(digits[:1])
+    return int(digits)
+
+
+def column_name(year: int, group: str, school_name: str, affiliated_school: Optional[str] = None) -> str:
+    """CSV column holding a school's cut-off, as getColumnName"""
+    # IP doesn't have affiliated cutoffs
+    if group != "IP" and affiliated_school and school_name == affiliated_school:
+        return f"{year}_{group}_Aff"
+    return f"{year}_{group}"
+
+
+def school_gender(row: Dict[str, str]) -> str:
+    return row.get("Gender") or "mixed"
+
+
+@dataclass(frozen=True)
+class EligibilityQuery:
+    """Filter settings of the school-finder"""
+
+    score: int
+    max_cutoff: int = MAX_AL
+    gender: str = "all"  # One of GENDERS
+    mother_tongues: Tuple[str, ...] = ()  # Columns that must be "Y", e.g. ("HCL",)
+    historical_max: bool = False  # Use each school's highest cut-off across the years
+    affiliated_school: Optional[str] = None  # Name of the student's affiliated school
+    location: Optional[Point] = None  # Home (latitude, longitude); None skips the distance filter
+    max_distance_km: float = 50
+    sort_by: str = "name"  # One of SORT_ORDERS; "distance" needs a location
+
+
+def cutoff_for(row: Dict[str, str], group: str, years: Sequence[int], query: EligibilityQuery) -> Optional[int]:
+    """The cut-off a query compares against: the first (current) year, or the max across years"""
+    name = row.get("School Name", "")
+    if not query.historical_max:
+        return extract_numeric_score(row.get(column_name(years[0], group, name, query.affiliated_school)), group)
+
+    scores = [
+        extract_numeric_score(row.get(column_name(year, group, name, query.affiliated_school)), group)
+        for year in years
+    ]
+    scores = [score for score in scores if score is not None]
+    return max(scores) if scores else None
+
+
+def is_eligible(row: Dict[str, str], query: EligibilityQuery, years: Sequence[int]) -> bool:
+    """Whether a school passes the score, gender, mother tongue and distance filters"""
+    if not any(
+        (cutoff := cutoff_for(row, group, years, query)) is not None
+        and query.score <= cutoff <= query.max_cutoff
+        for group in eligible_groups(query.score)
+    ):
+        return False
+    if query.gender != "all" and school_gender(row) != query.gender:
+        return False
+    if not all(row.get(language) == "Y" for language in query.mother_tongues):
+        return False
+    if query.location is None:
+        return True
+    location = school_location(row)
+    return location is not None and geo_distance(query.location, location) / 1000 <= query.max_distance_km
+
+
+def scan(rows: List[Dict[str, str]], query: EligibilityQuery, years: Sequence[int]) -> List[int]:
+    """Indexes of eligible rows, checking every row (reference implementation)"""
+    eligible = [i for i, row in enumerate(rows) if is_eligible(row, query, years)]
+    if query.sort_by == "distance" and query.location is not None:
+        eligible.sort(key=lambda i: geo_distance(query.location, school_location(rows[i])))
+    return eligible
@@ -0,0 +1,149 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from config import Config
+from models.cutoff import POSTING_GROUPS
+from query.eligibility import (
+    MOTHER_TONGUES,
+    EligibilityQuery,
+    eligible_groups,
+    extract_numeric_score,
+    school_gender,
+)
+from query.spatial import SpatialIndex
+from utils.columnar import load_rows
+
+# Index year for each school's highest cut-off across the engine's years
+HISTORICAL_MAX = "max"
+
+
+class ScoreIndex:
+    """
+    Cut-offs of one (year, posting group, affiliated) column in sorted
+    order, with prefix bitsets: bit i of prefix[k] is set if row i is among
+    the k lowest cut-offs. Each row appears at most once, so the rows with a
+    cut-off in [low, high] are prefix[j] ^ prefix[i] for the two bisect points.
+    """
+
+    def __init__(self, cutoffs: Sequence[Optional[int]]):
+        ranked = sorted((cutoff, row) for row, cutoff in enumerate(cutoffs) if cutoff is not None)
+        self.scores = [cutoff for cutoff, _ in ranked]
+        self.prefix = [0]
+        for _, row in ranked:
+            self.prefix.append(self.prefix[-1] | (1 << row))
+
+    def between(self, low: int, high: int) -> int:
+        """Bitset of rows whose cut-off is within [low, high]"""
+        if low > high:
+            return 0
+        return self.prefix[bisect_right(self.scores, high)] ^ self.prefix[bisect_left(self.scores, low)]
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SchoolQueryEngine:
+    """
+    Answers school-finder eligibility queries from precomputed indexes.
+
+    Cut-offs are parsed once into a ScoreIndex per (year, posting group,
+    affiliated) column, plus one per (posting group, affiliated) holding
+    each school's maximum across the years. Gender and mother tongue
+    filters are precomputed bitsets, and the distance filter is a bitset
+    from a SpatialIndex radius query, so a query is a few bisects, a tree
+    walk and bitwise ANDs. Results match query.eligibility.scan().
+    """
+
+    def __init__(self, rows: List[Dict[str, str]], years: Optional[Sequence[int]] = None):
+        self.rows = rows
+        self.years = tuple(years or Config.EXPORT_YEARS)
+        self.names = [row.get("School Name", "") for row in rows]
+
+        self._indexes: Dict[Tuple[Union[int, str], str, bool], ScoreIndex] = {}
+        for group in POSTING_GROUPS:
+            for affiliated in (False, True) if group != "IP" else (False,):
+                suffix = "_Aff" if affiliated else ""
+                by_year = [
+                    [extract_numeric_score(row.get(f"{year}_{group}{suffix}"), group) for row in rows]
+                    for year in self.years
+                ]
+                for year, cutoffs in zip(self.years, by_year):
+                    self._indexes[(year, group, affiliated)] = ScoreIndex(cutoffs)
+                highest = [
+                    max((c for c in row_cutoffs if c is not None), default=None)
+                    for row_cutoffs in zip(*by_year)
+                ]
+                self._indexes[(HISTORICAL_MAX, group, affiliated)] = ScoreIndex(highest)
+
+        self._gender_masks: Dict[str, int] = {}
+        self._name_masks: Dict[str, int] = {}
+        for i, row in enumerate(rows):
+            gender = school_gender(row)
+            self._gender_masks[gender] = self._gender_masks.get(gender, 0) | (1 << i)
+            self._name_masks[self.names[i]] = self._name_masks.get(self.names[i], 0) | (1 << i)
+        self._mother_tongue_masks = {
+            language: sum(1 << i for i, row in enumerate(rows) if row.get(language) == "Y")
+            for language in MOTHER_TONGUES
+        }
+        self.spatial = SpatialIndex.from_rows(rows)
+        # Result order: by school name, like the frontend's default sort
+        order = sorted(range(len(rows)), key=lambda i: self.names[i].casefold())
+        self._rank = [0] * len(rows)
+        for rank, i in enumerate(order):
+            self._rank[i] = rank
+
+    @classmethod
+    def from_file(cls, path: str, years: Optional[Sequence[int]] = None) -> "SchoolQueryEngine":
+        """Build from a schools CSV (or its Arrow copy)"""
+        _, rows = load_rows(path)
+        return cls(rows, years)
+
+    def mask(self, query: EligibilityQuery) -> int:
+        """Bitset of eligible rows"""
+        mask = self._attribute_mask(query)
+        if query.location is not None:
+            mask &= self.spatial.mask_within(query.location, query.max_distance_km)
+        return mask
+
+    def _attribute_mask(self, query: EligibilityQuery) -> int:
+        """Bitset of rows passing every filter except distance"""
+        year = HISTORICAL_MAX if query.historical_max else self.years[0]
+        affiliated = self._name_masks.get(query.affiliated_school, 0) if query.affiliated_school else 0
+
+        mask = 0
+        for group in eligible_groups(query.score):
+            eligible = self._indexes[(year, group, False)].between(query.score, query.max_cutoff)
+            if group == "IP" or not affiliated:
+                mask |= eligible
+            else:
+                # The affiliated school is judged on its affiliated cut-offs only
+                mask |= eligible & ~affiliated
+                mask |= self._indexes[(year, group, True)].between(query.score, query.max_cutoff) & affiliated
+
+        if query.gender != "all":
+            mask &= self._gender_masks.get(query.gender, 0)
+        for language in query.mother_tongues:
+            mask &= self._mother_tongue_masks.get(language, 0)
+        return mask
+
+    def query(self, query: EligibilityQuery) -> List[int]:
+        """Indexes of eligible rows, ordered by school name or by distance"""
+        mask = self._attribute_mask(query)
+        if query.location is None:
+            return sorted(_bits(mask), key=self._rank.__getitem__)
+
+        # Nearest first, so sorting by distance is free
+        nearby = [
+            row for row, _ in self.spatial.within(query.location, query.max_distance_km)
+            if mask >> row & 1
+        ]
+        if query.sort_by == "distance":
+            return nearby
+        return sorted(nearby, key=self._rank.__getitem__)
+
+    def schools(self, query: EligibilityQuery) -> List[Dict[str, str]]:
+        """Eligible rows, in query order"""
+        return [self.rows[i] for i in self.query(query)]
@@ -0,0 +1,166 @@
+"""
+Spatial index over school coordinates for radius and nearest-school
+queries, with distances computed as the school-finder computes them
+(geolib getDistance: spherical law of cosines on a 6378137 m sphere,
+rounded to the metre).
+"""
+
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS = 6378137  # metres, as geolib
+LEAF_SIZE = 8
+
+Point = Tuple[float, float]  # (latitude, longitude) in degrees
+
+
+def geo_distance(a: Point, b: Point) -> int:
+    """Distance in metres between two points, as geolib getDistance"""
+    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
+    cosine = math.sin(lat2) * math.sin(lat1) + math.cos(lat2) * math.cos(lat1) * math.cos(lon1 - lon2)
+    return round(math.acos(max(-1.0, min(1.0, cosine))) * EARTH_RADIUS)
+
+
+def school_location(row: Dict[str, str]) -> Optional[Point]:
+    """A row's coordinates, or None where the frontend would skip the school (missing, zero or invalid)"""
+    try:
+        latitude, longitude = float(row.get("Latitude") or "nan"), float(row.get("Longitude") or "nan")
+    except ValueError:
+        return None
+    if not latitude or not longitude or math.isnan(latitude) or math.isnan(longitude):
+        return None
+    return latitude, longitude
+
+
+def _unit_vector(point: Point) -> Tuple[float, float, float]:
+    lat, lon = math.radians(point[0]), math.radians(point[1])
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord(metres: float) -> float:
+    """Straight-line distance between unit-sphere points the given great-circle distance apart"""
+    return 2 * math.sin(min(metres / EARTH_RADIUS, math.pi) / 2)
+
+
+class _Node:
+    __slots__ = ("axis", "split", "left", "right", "rows")
+
+    def __init__(self, axis=0, split=0.0, left=None, right=None, rows=None):
+        self.axis = axis
+        self.split = split
+        self.left = left
+        self.right = right
+        self.rows = rows  # Leaf bucket of row indexes
+
+
+class SpatialIndex:
+    """
+    KD-tree over schools' positions as 3D unit vectors, where straight-line
+    (chord) distance orders points exactly as great-circle distance does.
+    Radius and k-nearest queries visit O(log n + k) nodes instead of
+    computing a distance to every school; candidates are then checked with
+    geo_distance so results match the frontend to the metre.
+    """
+
+    def __init__(self, locations: Sequence[Optional[Point]]):
+        self.locations = list(locations)
+        self._vectors = {row: _unit_vector(point) for row, point in enumerate(self.locations) if point}
+        self._root = self._build(list(self._vectors)) if self._vectors else None
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, str]]) -> "SpatialIndex":
+        return cls([school_location(row) for row in rows])
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def _build(self, rows: List[int]) -> _Node:
+        if len(rows) <= LEAF_SIZE:
+            return _Node(rows=rows)
+        # Split on the axis with the widest spread
+        spreads = [
+            max(self._vectors[r][axis] for r in rows) - min(self._vectors[r][axis] for r in rows)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        rows.sort(key=lambda r: self._vectors[r][axis])
+        middle = len(rows) // 2
+        return _Node(
+            axis=axis,
+            split=self._vectors[rows[middle]][axis],
+            left=self._build(rows[:middle]),
+            right=self._build(rows[middle:]),
+        )
+
+    def within(self, point: Point, km: float) -> List[Tuple[int, int]]:
+        """(row, metres) for every school within km of point (inclusive, after rounding), nearest first"""
+        if self._root is None:
+            return []
+        target = _unit_vector(point)
+        # Pad by a metre so rounding and float error never drop a boundary school
+        radius = _chord(km * 1000 + 1)
+        limit = radius * radius
+
+        candidates = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.rows is not None:
+                for row in node.rows:
+                    vector = self._vectors[row]
+                    if sum((v - t) ** 2 for v, t in zip(vector, target)) <= limit:
+                        candidates.append(row)
+                continue
+            offset = target[node.axis] - node.split
+            near, far = (node.left, node.right) if offset < 0 else (node.right, node.left)
+            stack.append(near)
+            if offset * offset <= limit:
+                stack.append(far)
+
+        found = []
+        for row in candidates:
+            metres = geo_distance(point, self.locations[row])
+            if metres / 1000 <= km:
+                found.append((row, metres))
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found
+
+    def mask_within(self, point: Point, km: float) -> int:
+        """Bitset of rows within km of point"""
+        mask = 0
+        for row, _ in self.within(point, km):
+            mask |= 1 << row
+        return mask
+
+    def nearest(self, point: Point, k: int) -> List[Tuple[int, int]]:
+        """(row, metres) for the k schools nearest to point, nearest first"""
+        if self._root is None or k <= 0:
+            return []
+        target = _unit_vector(point)
+
+        best: List[Tuple[float, int]] = []  # Max-heap of (-squared chord, row)
+        queue = [(0.0, 0, self._root)]  # Min-heap of (lower bound, tiebreak, node)
+        tiebreak = 1
+        while queue:
+            bound, _, node = heapq.heappop(queue)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            if node.rows is not None:
+                for row in node.rows:
+                    squared = sum((v - t) ** 2 for v, t in zip(self._vectors[row], target))
+                    if len(best) < k:
+                        heapq.heappush(best, (-squared, row))
+                    elif squared < -best[0][0]:
+                        heapq.heapreplace(best, (-squared, row))
+                continue
+            offset = target[node.axis] - node.split
+            near, far = (node.left, node.right) if offset < 0 else (node.right, node.left)
+            heapq.heappush(queue, (bound, tiebreak, near))
+            heapq.heappush(queue, (max(bound, offset * offset), tiebreak + 1, far))
+            tiebreak += 2
+
+        found = [(row, geo_distance(point, self.locations[row])) for _, row in best]
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Find the schools a PSLE AL score qualifies for, with the same filters as
+the school-finder app, answered from precomputed indexes.
+"""
+
+import argparse
+import random
+import time
+from config import Config
+from query import EligibilityQuery, SchoolQueryEngine, scan
+from query.eligibility import GENDERS, MAX_AL, MOTHER_TONGUES, SORT_ORDERS
+
+
+def verify(engine: SchoolQueryEngine):
+    """Check the indexed engine against the row-by-row scan on every filter combination."""
+    affiliated_schools = [None] + sorted(set(engine.names))
+    queries = [
+        EligibilityQuery(score, max_cutoff, gender, mother_tongues, historical_max, affiliated)
+        for score in range(4, MAX_AL + 1)
+        for max_cutoff in (score, 20, MAX_AL)
+        for gender in GENDERS
+        for mother_tongues in ((), ("HCL",), ("HML", "HTL"), ("ML",))
+        for historical_max in (False, True)
+        for affiliated in affiliated_schools[:: max(1, len(affiliated_schools) // 10)]
+    ]
+
+    start = time.perf_counter()
+    expected = [sorted(scan(engine.rows, query, engine.years)) for query in queries]
+    scan_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [engine.query(query) for query in queries]
+    engine_elapsed = time.perf_counter() - start
+
+    mismatches = 0
+    for query, rows, reference in zip(queries, results, expected):
+        if sorted(rows) != reference:
+            mismatches += 1
+            print(f"Mismatch for {query}: {len(rows)} vs {len(reference)} schools")
+
+    print(f"scan:   {len(queries) / scan_elapsed:,.0f} queries/s")
+    print(f"engine: {len(queries) / engine_elapsed:,.0f} queries/s")
+
+    # Distance filters from random homes across the schools' bounding box
+    locations = [location for location in engine.spatial.locations if location]
+    if locations:
+        rng = random.Random(0)
+        latitudes, longitudes = [lat for lat, _ in locations], [lon for _, lon in locations]
+        homes = [
+            (rng.uniform(min(latitudes), max(latitudes)), rng.uniform(min(longitudes), max(longitudes)))
+            for _ in range(200)
+        ]
+        spatial_queries = [
+            EligibilityQuery(score, gender=gender, location=home, max_distance_km=km, sort_by="distance")
+            for home in homes
+            for score in (8, 16, 22, 26)
+            for gender in ("all", "girls")
+            for km in (1, 3, 10)
+        ]
+        start = time.perf_counter()
+        expected = [scan(engine.rows, query, engine.years) for query in spatial_queries]
+        scan_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        results = [engine.query(query) for query in spatial_queries]
+        engine_elapsed = time.perf_counter() - start
+
+        for query, rows, reference in zip(spatial_queries, results, expected):
+            if rows != reference:
+                mismatches += 1
+                print(f"Mismatch for {query}: {len(rows)} vs {len(reference)} schools")
+        queries += spatial_queries
+
+        print(f"scan   (with distance): {len(spatial_queries) / scan_elapsed:,.0f} queries/s")
+        print(f"engine (with distance): {len(spatial_queries) / engine_elapsed:,.0f} queries/s")
+
+    print(f"\nChecked {len(queries)} queries: {mismatches} mismatches")
+
+
+def parse_location(value: str):
+    """"LAT,LON" -> (lat, lon)"""
+    try:
+        latitude, longitude = (float(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LAT,LON, got {value!r}")
+    return latitude, longitude
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find schools eligible for a PSLE AL score")
+    parser.add_argument("score", type=int, nargs="?", help="PSLE AL score (4-30)")
+    parser.add_argument(
+        "--csv",
+        default="school-finder/public/schools.csv",
+        help="Schools CSV or Arrow file (default: school-finder/public/schools.csv)"
+    )
+    parser.add_argument(
+        "--max-cutoff",
+        type=int,
+        default=MAX_AL,
+        help=f"Ignore schools with a cut-off above this (default: {MAX_AL})"
+    )
+    parser.add_argument("--gender", choices=GENDERS, default="all", help="School type (default: all)")
+    parser.add_argument(
+        "--mt",
+        action="append",
+        choices=MOTHER_TONGUES,
+        default=[],
+        help="Required mother tongue offering (repeatable)"
+    )
+    parser.add_argument(
+        "--historical-max",
+        action="store_true",
+        help=f"Use each school's highest cut-off across {', '.join(map(str, Config.EXPORT_YEARS))}"
+    )
+    parser.add_argument("--affiliated", help="Name of the school the student is affiliated with")
+    parser.add_argument("--near", type=parse_location, help="Home location as LAT,LON")
+    parser.add_argument(
+        "--within",
+        type=float,
+        default=50,
+        help="With --near: only schools within this many km (default: 50)"
+    )
+    parser.add_argument("--sort", choices=SORT_ORDERS, default="name", help="Result order (default: name)")
+    parser.add_argument(
+        "--nearest",
+        type=int,
+        metavar="K",
+        help="With --near: list the K nearest schools, ignoring the other filters"
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check the indexes against a full scan for many queries and report throughput"
+    )
+
+    args = parser.parse_args()
+    engine = SchoolQueryEngine.from_file(args.csv)
+
+    if args.verify:
+        verify(engine)
+        return
+    if args.nearest:
+        if not args.near:
+            parser.error("--nearest needs --near")
+        for row, metres in engine.spatial.nearest(args.near, args.nearest):
+            print(f"{metres / 1000:6.2f} km  {engine.names[row]}")
+        return
+    if args.score is None:
+        parser.error("score is required unless --verify or --nearest is given")
+    if args.sort == "distance" and not args.near:
+        parser.error("--sort distance needs --near")
+
+    query = EligibilityQuery(
+        score=args.score,
+        max_cutoff=args.max_cutoff,
+        gender=args.gender,
+        mother_tongues=tuple(args.mt),
+        historical_max=args.historical_max,
+        affiliated_school=args.affiliated,
+        location=args.near,
+        max_distance_km=args.within,
+        sort_by=args.sort,
+    )
+    schools = engine.schools(query)
+    for school in schools:
+        print(school["School Name"])
+    print(f"\n{len(schools)} schools")
+
+
+if __name__ == "__main__":
+    main()
@@ -124,6 +124,15 @@ function App() {
     return `${year}_${group}`;
   };
 
+  // Column of a cut-off metric precomputed by the scraper (e.g. PG3_Aff_Max),
+  // with the same affiliated-column rule as getColumnName
+  const getMetricColumn = (group, metric, schoolName) => {
+    if (group !== 'IP' && affiliatedSchool && schoolName === affiliatedSchool) {
+      return `${group}_Aff_${metric}`;
+    }
+    return `${group}_${metric}`;
+  };
+
   // Helper function to get school gender type from CSV data
   const getSchoolGender = (school) => {
     return school.Gender || 'mixed';
@@ -217,17 +226,22 @@ function App() {
         let numericScore;
 
         if (useHistoricalMax) {
-          // Get scores from all 3 years and use the maximum
-          const years = ['2025', '2024', '2023'];
-          const scores = years
-            .map(year => {
-              const colName = getColumnName(year, group, schoolName);
-              return extractNumericScore(school[colName], group);
-            })
-            .filter(s => s !== null && !isNaN(s));
-
-          if (scores.length > 0) {
-            numericScore = Math.max(...scores);
+          const precomputed = extractNumericScore(school[getMetricColumn(group, 'Max', schoolName)], group);
+          if (precomputed !== null) {
+            numericScore = precomputed;
+          } else {
+            // CSV without derived metrics: get scores from all 3 years and use the maximum
+            const years = ['2025', '2024', '2023'];
+            const scores = years
+              .map(year => {
+                const colName = getColumnName(year, group, schoolName);
+                return extractNumericScore(school[colName], group);
+              })
+              .filter(s => s !== null && !isNaN(s));
+
+            if (scores.length > 0) {
+              numericScore = Math.max(...scores);
+            }
           }
         } else {
           // Use 2025 only
@@ -1,11 +1,26 @@
 #!/usr/bin/env python3
 """
 Scrape higher mother tongue languages offered by each school from MOE SchoolFinder.
+
+Each language is scraped in its own browser context, all in parallel.
+Images, fonts, media and analytics are blocked.
+
+By default the JSON search responses the page loads are captured and the
+same search is re-issued once for every result, so no pages are rendered
+after the first. If no usable response is captured (or its results don't
+agree with the page), the DOM is paginated instead, waiting for the result
+list to change after each click rather than sleeping.
 """
 
+import argparse
+import asyncio
 import json
+import os
 import time
-from playwright.sync_api import sync_playwright
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+from playwright.async_api import async_playwright
+from config import Config
 
 BASE_URL = "https://www.moe.gov.sg/schoolfinder"
 
@@ -15,6 +30,45 @@ LANGUAGE_FILTERS = {
     "Higher Malay Language": "Higher%20Malay%20Language",
 }
 
+SCHOOL_LINK = 'a[href*="schooldetail"]'
+PAGE_SIZE = 20  # Schools per results page
+
+# Not needed to read the results list
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "newrelic.com",
+    "nr-data.net",
+)
+
+# Keys a search API may use for the result total, page size and offset
+API_TOTAL_KEYS = ("numFound", "total", "totalCount", "total_count", "totalResults", "count")
+API_SIZE_KEYS = ("rows", "size", "limit", "pageSize", "page_size", "per_page")
+API_OFFSET_KEYS = ("start", "offset", "from")
+API_PAGE_KEYS = ("page", "pageNum", "page_num")
+
+# Names of the schools listed on the current page
+_SCHOOL_NAMES_JS = """
+    () => {
+        const results = [];
+        document.querySelectorAll('a[href*="schooldetail"]').forEach(link => {
+            const nameEl = link.querySelector('p');
+            if (nameEl) {
+                const name = nameEl.textContent.trim();
+                if (name && !name.includes('Add school')) {
+                    results.push(name);
+                }
+            }
+        });
+        return results;
+    }
+"""
+
 
 def build_url(language_filter: str) -> str:
     """Build the MOE SchoolFinder URL with the specified language filter."""
@@ -26,122 +80,273 @@ def build_url(language_filter: str) -> str:
     )
 
 
-def extract_schools_from_page(page) -> list[str]:
-    """Extract school names from the current page."""
-    schools = page.evaluate("""
-        () => {
-            const results = [];
-            document.querySelectorAll('a[href*="schooldetail"]').forEach(link => {
-                const nameEl = link.querySelector('p');
-                if (nameEl) {
-                    const name = nameEl.textContent.trim();
-                    if (name && !name.includes('Add school')) {
-                        results.push(name);
-                    }
-                }
-            });
-            return results;
-        }
-    """)
-    return schools
+async def block_resources(route):
+    """Abort requests for resources that don't affect the results list"""
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
 
 
-def scrape_language(page, language_name: str, language_filter: str) -> list[str]:
-    """Scrape all schools offering a specific higher mother tongue language."""
-    url = build_url(language_filter)
-    print(f"\nScraping {language_name}...")
-    page.goto(url)
+async def extract_schools_from_page(page) -> list[str]:
+    """Extract school names from the current page."""
+    return await page.evaluate(_SCHOOL_NAMES_JS)
 
-    # Wait for the page to load
-    page.wait_for_selector('a[href*="schooldetail"]', timeout=15000)
-    time.sleep(2)
 
-    # Get total count
-    count_text = page.locator('text=/Showing \\d+ Secondary schools/').first.inner_text()
-    total_count = int(count_text.split()[1])
-    print(f"  Found {total_count} schools")
+def is_search_response(response) -> bool:
+    """A JSON XHR/fetch response, i.e. a candidate search API call"""
+    return (
+        response.request.resource_type in ("xhr", "fetch")
+        and "json" in response.headers.get("content-type", "")
+    )
 
-    # Calculate expected pages (20 schools per page)
-    expected_pages = (total_count + 19) // 20
 
-    all_schools = []
-    page_num = 1
+def _school_name(doc: dict) -> Optional[str]:
+    for key, value in doc.items():
+        if "name" in key.lower() and isinstance(value, str) and value.strip():
+            return value.strip()
+    if isinstance(doc.get("title"), str):
+        return doc["title"].strip()
+    return None
+
+
+def extract_api_results(data) -> Optional[list[str]]:
+    """
+    School names from a search response: the longest list of objects with
+    a name-like field anywhere in the document, or None if there is none.
+    """
+    best: Optional[list[str]] = None
+
+    def walk(node):
+        nonlocal best
+        if isinstance(node, dict):
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list) and node and all(isinstance(item, dict) for item in node):
+            names = [_school_name(item) for item in node]
+            if all(names) and (best is None or len(names) > len(best)):
+                best = names
+            for item in node:
+                walk(item)
+
+    walk(data)
+    return best
+
+
+def _bulk_params(params: list[tuple], total: int) -> Optional[list[tuple]]:
+    """
+    Search (key, value) pairs asking for all total results at once: page
+    size raised to total, offset and page number back to the first page.
+    None if there is no page size to raise. Values keep their type (query
+    strings stay strings).
+    """
+    if not any(key in API_SIZE_KEYS for key, _ in params):
+        return None
+
+    def first_page(value):
+        # Keep zero- or one-based page numbering as the page used it
+        return value if str(value) in ("0", "1") else type(value)(1)
+
+    bulk = []
+    for key, value in params:
+        if key in API_SIZE_KEYS:
+            value = type(value)(total)
+        elif key in API_OFFSET_KEYS:
+            value = type(value)(0)
+        elif key in API_PAGE_KEYS:
+            value = first_page(value)
+        bulk.append((key, value))
+    return bulk
+
+
+async def fetch_all_results(context, response, total: int) -> Optional[list[str]]:
+    """Re-issue a captured search request for all total results; None if it can't be done"""
+    request = response.request
+    headers = {
+        key: value for key, value in (await request.all_headers()).items()
+        if not key.startswith(":") and key.lower() not in ("content-length", "host", "cookie")
+    }
+    url = urlparse(request.url)
+
+    if request.method == "GET":
+        params = _bulk_params(parse_qsl(url.query, keep_blank_values=True), total)
+        if params is None:
+            return None
+        bulk = await context.request.get(urlunparse(url._replace(query=urlencode(params))), headers=headers)
+    else:
+        body = request.post_data_json
+        params = _bulk_params(list(body.items()), total) if isinstance(body, dict) else None
+        if params is None:
+            return None
+        bulk = await context.request.fetch(request.url, method=request.method, headers=headers, data=dict(params))
+
+    if not bulk.ok:
+        return None
+    return extract_api_results(await bulk.json())
+
+
+async def harvest_from_api(context, responses, total: int, first_page: list[str]) -> Optional[list[str]]:
+    """
+    All school names from the captured search responses, or None to fall
+    back to the DOM. A response counts only if its results include every
+    school rendered on the first page, and the bulk result must hold as
+    many schools as the page reports.
+    """
+    for response in responses:
+        try:
+            names = extract_api_results(await response.json())
+        except Exception:
+            continue
+        if not names or not set(first_page) <= set(names):
+            continue
+
+        if len(names) < total:
+            try:
+                names = await fetch_all_results(context, response, total)
+            except Exception as e:
+                print(f"  Bulk request failed: {e}")
+                continue
+        if names and len(set(names)) >= total:
+            return names
+    return None
+
+
+async def wait_for_new_results(page, previous: list[str], timeout: int = 10000):
+    """Wait until the results list is non-empty and differs from previous"""
+    await page.wait_for_function(
+        f"""
+        (previous) => {{
+            const names = ({_SCHOOL_NAMES_JS})();
+            return names.length > 0 && names.join('\\n') !== previous;
+        }}
+        """,
+        arg="\n".join(previous),
+        timeout=timeout,
+    )
 
-    while page_num <= expected_pages:
-        # Extract schools from current page
-        schools = extract_schools_from_page(page)
-        all_schools.extend(schools)
-        print(f"  Page {page_num}: collected {len(schools)} schools (total: {len(all_schools)})")
 
-        if page_num >= expected_pages:
-            break
+async def scrape_language(browser, language_name: str, language_filter: str, use_api: bool = True) -> list[str]:
+    """Scrape all schools offering a specific higher mother tongue language."""
+    context = await browser.new_context()
+    await context.route("**/*", block_resources)
+    page = await context.new_page()
+    captured = []
+    page.on("response", lambda response: captured.append(response) if is_search_response(response) else None)
+    try:
+        print(f"Scraping {language_name}...")
+        await page.goto(build_url(language_filter), wait_until="domcontentloaded")
+
+        # Wait for the results and their count to render
+        await page.wait_for_selector(SCHOOL_LINK, timeout=15000)
+        count_text = await page.locator('text=/Showing \\d+ Secondary schools/').first.inner_text()
+        total_count = int(count_text.split()[1])
+        expected_pages = (total_count + PAGE_SIZE - 1) // PAGE_SIZE
+        print(f"  {language_name}: found {total_count} schools")
+
+        schools = await extract_schools_from_page(page)
+        if use_api:
+            from_api = await harvest_from_api(context, captured, total_count, schools)
+            if from_api is not None:
+                unique_schools = list(dict.fromkeys(from_api))
+                print(f"  {language_name}: {len(unique_schools)} unique schools from the search API")
+                return unique_schools
+            print(f"  {language_name}: no usable search response captured, paginating the page instead")
+
+        all_schools = []
+        page_num = 1
+
+        while page_num <= expected_pages:
+            all_schools.extend(schools)
+            print(f"  {language_name} page {page_num}: collected {len(schools)} schools (total: {len(all_schools)})")
+
+            if page_num >= expected_pages:
+                break
 
-        # Click next using JavaScript to avoid button detection issues
-        try:
-            # Use JavaScript to find and click the enabled next button
-            # The buttons use class 'moe-pagination__btn dir--right' for next buttons
-            clicked = page.evaluate("""
-                () => {
-                    const buttons = document.querySelectorAll('button.moe-pagination__btn.dir--right');
-                    for (const btn of buttons) {
-                        if (!btn.disabled && btn.getAttribute('aria-disabled') !== 'true') {
-                            btn.click();
-                            return true;
+            # Click next using JavaScript to avoid button detection issues
+            try:
+                # The buttons use class 'moe-pagination__btn dir--right' for next buttons
+                clicked = await page.evaluate("""
+                    () => {
+                        const buttons = document.querySelectorAll('button.moe-pagination__btn.dir--right');
+                        for (const btn of buttons) {
+                            if (!btn.disabled && btn.getAttribute('aria-disabled') !== 'true') {
+                                btn.click();
+                                return true;
+                            }
                         }
+                        return false;
                     }
-                    return false;
-                }
-            """)
+                """)
 
-            if not clicked:
-                print(f"  Could not find enabled next button, stopping at page {page_num}")
-                break
+                if not clicked:
+                    print(f"  {language_name}: no enabled next button, stopping at page {page_num}")
+                    break
 
-            # Wait for new content to load
-            time.sleep(2)
-            page.wait_for_selector('a[href*="schooldetail"]', timeout=10000)
+                # Continue as soon as the next page's results replace these
+                await wait_for_new_results(page, schools)
 
-        except Exception as e:
-            print(f"  Error navigating: {e}")
-            break
+            except Exception as e:
+                print(f"  {language_name}: error navigating: {e}")
+                break
 
-        page_num += 1
+            page_num += 1
+            schools = await extract_schools_from_page(page)
+    finally:
+        await context.close()
 
     # Remove duplicates while preserving order
     unique_schools = list(dict.fromkeys(all_schools))
-    print(f"  Total unique schools: {len(unique_schools)}")
+    print(f"  {language_name}: {len(unique_schools)} unique schools")
 
     return unique_schools
 
 
-def main():
-    """Main function to scrape all higher mother tongue languages."""
-    print("Starting MOE SchoolFinder scraper for Higher Mother Tongue Languages")
-
-    result = {
-        "higher_chinese_language": [],
-        "higher_tamil_language": [],
-        "higher_malay_language": [],
+async def scrape_all(use_api: bool = True) -> dict:
+    """Scrape every language concurrently, one browser context each"""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            results = await asyncio.gather(*(
+                scrape_language(browser, language_name, language_filter, use_api)
+                for language_name, language_filter in LANGUAGE_FILTERS.items()
+            ))
+        finally:
+            await browser.close()
+
+    return {
+        language_name.lower().replace(" ", "_"): schools
+        for language_name, schools in zip(LANGUAGE_FILTERS, results)
     }
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
 
-        # Scrape each language
-        for language_name, language_filter in LANGUAGE_FILTERS.items():
-            key = language_name.lower().replace(" ", "_")
-            schools = scrape_language(page, language_name, language_filter)
-            result[key] = schools
+def main():
+    """Main function to scrape all higher mother tongue languages."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--dom",
+        action="store_true",
+        help="Always paginate the rendered results instead of capturing the search API"
+    )
+    args = parser.parse_args()
+
+    print("Starting MOE SchoolFinder scraper for Higher Mother Tongue Languages")
+    start = time.perf_counter()
 
-        browser.close()
+    result = asyncio.run(scrape_all(use_api=not args.dom))
 
-    # Save to JSON file
-    output_file = "data/higher_mother_tongue.json"
-    with open(output_file, "w", encoding="utf-8") as f:
+    # Save to JSON file (atomically, so a failed run keeps the previous data)
+    output_file = Config.HMT_FILE
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{output_file}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(result, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_file)
 
-    print(f"\n✓ Data saved to {output_file}")
+    print(f"\n✓ Data saved to {output_file} in {time.perf_counter() - start:.1f}s")
     print(f"  - Higher Chinese Language: {len(result['higher_chinese_language'])} schools")
     print(f"  - Higher Tamil Language: {len(result['higher_tamil_language'])} schools")
     print(f"  - Higher Malay Language: {len(result['higher_malay_language'])} schools")
@@ -1,11 +1,27 @@
+import argparse
 import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
 from typing import List
 from models.school import School
 from parsers.main_page_parser import MainPageParser
-from parsers.detail_page_parser import DetailPageParser
+from parsers import DETAIL_PARSER_BACKENDS, get_detail_parser
+from utils.http_cache import HTTPCache
 from utils.http_client import HTTPClient
 from utils.rate_limiter import RateLimiter
+from utils.columnar import columnar_paths, export_columnar, load_rows
 from utils.csv_writer import CSVWriter
+from utils.journal import ScrapeJournal
+from utils.metrics import PARSE_BUCKETS, RunMetrics
+from utils.page_archive import PageArchive
+from utils.snapshot_diff import diff_snapshots, load_snapshot
+from utils.sqlite_store import SchoolStore
+from enrichment.derived import write_derived_metrics
 from config import Config
 
 logging.basicConfig(
@@ -13,14 +29,122 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_worker_archives = {}  # Archive root -> PageArchive, per reparse worker process
+
+
+def _parse_archived_page(job):
+    """Parse one archived detail page (runs in a reparse worker process)"""
+    root, digest, encoding, backend = job
+    archive = _worker_archives.get(root)
+    if archive is None:
+        archive = _worker_archives[root] = PageArchive(root)
+    return _parse_detail_page(backend, archive.load(digest), encoding)[0]
+
+
+def _decode_page(body: bytes, encoding) -> str:
+    """Page text, decoded like requests' Response.text (unknown encodings fall back to UTF-8)"""
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def _parse_detail_page(backend, body: bytes, encoding):
+    """Parse one fetched detail page (runs in a parse worker process); returns the result and parse seconds"""
+    start = time.perf_counter()
+    html = _decode_page(body, encoding)
+    result = get_detail_parser(backend)(html).parse()
+    return result, time.perf_counter() - start
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put onto a bounded queue, giving up if the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Take from a queue; None if the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+    return None
+
+
+class _RowWriter:
+    """Write stage: appends queued rows to the CSV on a background thread"""
+
+    def __init__(self, csv_writer: CSVWriter, maxsize: int):
+        self.csv_writer = csv_writer
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="csv-writer")
+
+    def start(self):
+        self._thread.start()
+
+    def append(self, school: School):
+        if self.error:
+            raise self.error
+        self.queue.put(school)
+
+    def _run(self):
+        while (school := self.queue.get()) is not None:
+            if self.error is None:  # Keep draining after a failure so append() never blocks
+                try:
+                    self.csv_writer.append(school)
+                except Exception as e:
+                    self.error = e
+
+    def close(self):
+        """Write the remaining rows and stop the thread"""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+        if self.error:
+            raise self.error
+
 
 class SchoolScraper:
     """Main scraper orchestrator"""
 
-    def __init__(self):
-        self.http_client = HTTPClient()
+    def __init__(
+        self,
+        max_workers: int = Config.MAX_WORKERS,
+        resume: bool = False,
+        parser_backend: str = Config.PARSER_BACKEND,
+        parse_workers: int = Config.PARSE_WORKERS,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.parse_workers = max(0, parse_workers)
+        self.queue_size = max(1, Config.PIPELINE_QUEUE_SIZE)
+        self.resume = resume
+        self.parser_backend = parser_backend
+        self.journal = ScrapeJournal()
+        self.metrics = RunMetrics()
         self.rate_limiter = RateLimiter()
+        self.http_cache = HTTPCache() if Config.CACHE_ENABLED else None
+        self.archive = PageArchive() if Config.ARCHIVE_ENABLED else None
+        self.store = SchoolStore(Config.SQLITE_FILE) if Config.SQLITE_FILE else None
+        self.store_run_id = None
+        self.http_client = HTTPClient(
+            pool_size=self.max_workers,
+            rate_limiter=self.rate_limiter,
+            cache=self.http_cache,
+            metrics=self.metrics,
+        )
+        self.csv_writer = CSVWriter(Config.OUTPUT_FILE, years=Config.EXPORT_YEARS)
         self.schools: List[School] = []
+        self._rows_streamed = 0  # Leading entries of self.schools already written to the CSV
+        self.detailed = set()  # Detail URLs of schools with detail page data (not just main page cut-offs)
+        self._row_writer = None  # Write stage while detail pages are being scraped
 
     def run(self):
         """Execute complete scraping workflow"""
@@ -28,127 +152,454 @@ class SchoolScraper:
             logger.info("=" * 60)
             logger.info("Starting Singapore Secondary School Scraper")
             logger.info("=" * 60)
+            self._start_store_run("scrape")
 
             # Step 1: Scrape main page
             logger.info(f"\n📄 Fetching main page: {Config.MAIN_PAGE_URL}")
-            self.schools = self._scrape_main_page()
+            with self.metrics.stage("main_page"):
+                self.schools = self._scrape_main_page()
             logger.info(
                 f"✓ Found {len(self.schools)} schools (filtered: no affiliated, no special schools)"
             )
 
             # Step 2: Scrape detail pages
+            pending = self._restore_from_journal()
             logger.info(f"\n📍 Fetching individual school pages for address and historical data...")
-            self._scrape_detail_pages()
+            self.journal.open(resume=self.resume)
+            self.csv_writer.open()
+            logger.info(f"  Streaming rows to {self.csv_writer.partial_path}")
+            with self.metrics.stage("detail_pages"):
+                self._scrape_detail_pages(pending)
 
-            # Step 3: Export to CSV
+            # Step 3: Publish the CSV
             logger.info(f"\n💾 Exporting to {Config.OUTPUT_FILE}")
-            self._export_to_csv()
+            with self.metrics.stage("export"):
+                self._export_to_csv()
 
+            self.metrics.status = "completed"
             logger.info("\n" + "=" * 60)
             logger.info("✓ Scraping completed successfully!")
             logger.info("=" * 60)
 
+        except KeyboardInterrupt:
+            self.metrics.status = "interrupted"
+            logger.warning(f"\n⏹ Interrupted. Completed schools are saved; rerun with --resume to continue")
+            raise
         except Exception as e:
+            self.metrics.status = "failed"
             logger.error(f"\n❌ Scraping failed: {e}", exc_info=True)
             raise
         finally:
+            self._log_rate_limiter_stats()
+            self._log_cache_stats()
+            self.csv_writer.close()
+            self.journal.close()
             self.http_client.close()
+            self._close_archive()
+            self._close_store()
+            self._write_metrics()
+
+    def _start_store_run(self, kind: str):
+        """Record this run in the SQLite store, if one is configured"""
+        if self.store:
+            self.store_run_id = self.store.start_run(kind, Config.MAIN_PAGE_URL, self.metrics.started_at)
+
+    def _close_store(self):
+        """Record how the run ended and close the SQLite store"""
+        if not self.store:
+            return
+        if self.store_run_id is not None:
+            self.store.finish_run(self.store_run_id, self.metrics.status, schools=len(self.schools))
+        self.store.close()
+
+    def _close_archive(self):
+        """Close the page archive and report what this run added"""
+        if not self.archive:
+            return
+        had_dictionary = self.archive.dictionary is not None
+        self.archive.close()
+        stats = self.archive.stats
+        logger.info(
+            f"🗃 Archived {stats['pages']} pages in {self.archive.root} (run {self.archive.run}): "
+            f"{stats['new_objects']} new, {stats['bytes_in'] / 1024:.1f} KiB fetched"
+        )
+        if not had_dictionary and self.archive.dictionary is not None:
+            logger.info(f"  Trained zstd dictionary {self.archive.dictionary.dict_id()} and recompressed the archive")
+
+    def _write_metrics(self):
+        """Write this run's metrics as JSON and Prometheus text"""
+        self.metrics.extra["rate_limiter"] = self.rate_limiter.stats()
+        if self.http_cache:
+            self.metrics.extra["http_cache"] = dict(self.http_cache.stats)
+        try:
+            self.metrics.write(Config.METRICS_FILE, Config.METRICS_PROM_FILE)
+        except OSError as e:
+            logger.warning(f"⚠ Could not write metrics: {e}")
+            return
+        logger.info(f"📊 Run metrics: {Config.METRICS_FILE}, {Config.METRICS_PROM_FILE}")
+
+    def _log_rate_limiter_stats(self):
+        """Report the adapted request rate and queueing delay per host"""
+        for host, stats in self.rate_limiter.stats().items():
+            logger.info(
+                f"⏱ {host}: {stats['rate']} req/s, {stats['requests']} requests, "
+                f"{stats['throttled']} throttled, avg queue delay {stats['avg_queue_delay']}s "
+                f"(max {stats['max_queue_delay']}s)"
+            )
+
+    def _log_cache_stats(self):
+        """Report HTTP cache effectiveness for this run"""
+        if not self.http_cache:
+            return
+        stats = self.http_cache.stats
+        logger.info(
+            f"🗄 HTTP cache: {stats['hits']} fresh hits, {stats['revalidated']} revalidated (304), "
+            f"{stats['misses']} misses, {stats['evictions']} evicted, "
+            f"{stats['bytes_saved'] / 1024:.1f} KiB saved, "
+            f"{stats['bytes_downloaded'] / 1024:.1f} KiB downloaded"
+        )
 
     def _scrape_main_page(self) -> List[School]:
         """Scrape the main cut-off points page"""
-        self.rate_limiter.wait()
         response = self.http_client.get(Config.MAIN_PAGE_URL)
+        if self.archive:
+            self.archive.store(Config.MAIN_PAGE_URL, response.content, encoding=response.encoding or response.apparent_encoding)
+        start = time.perf_counter()
         parser = MainPageParser(response.text)
-        return parser.parse()
-
-    def _scrape_detail_pages(self, preview_count: int = 15):
-        """Scrape all individual school detail pages with preview confirmation"""
-        total = len(self.schools)
-
-        for i, school in enumerate(self.schools, 1):
-            # Pause after preview_count schools for user confirmation
-            if i == preview_count + 1:
-                logger.info(f"\n{'=' * 60}")
-                logger.info(f"Preview complete: {preview_count} schools scraped")
-                logger.info(f"Remaining: {total - preview_count} schools")
-                logger.info("=" * 60)
-
-                response = input("\nContinue scraping remaining schools? [Y/n]: ").strip().lower()
-                if response in ['n', 'no']:
-                    logger.info("Scraping stopped by user. Exporting preview data...")
-                    # Trim schools list to only include scraped ones
-                    self.schools = self.schools[:preview_count]
-                    return
-                logger.info("\nContinuing with remaining schools...\n")
+        schools = parser.parse()
+        self.metrics.observe(
+            "parse_duration_seconds", time.perf_counter() - start, PARSE_BUCKETS, page="main", parser="bs4"
+        )
+        return schools
+
+    def _restore_from_journal(self) -> List[School]:
+        """Swap in journaled schools when resuming; returns those still to scrape"""
+        if not self.resume:
+            return list(self.schools)
+
+        completed = self.journal.completed_schools()
+        pending = []
+        for i, school in enumerate(self.schools):
+            if school.detail_url in completed:
+                self.schools[i] = completed[school.detail_url]
+                self.detailed.add(school.detail_url)
+            else:
+                pending.append(school)
+
+        logger.info(
+            f"↻ Resuming from {self.journal.path}: {len(self.schools) - len(pending)} schools done, "
+            f"{len(pending)} missing or failed"
+        )
+        return pending
+
+    def _scrape_detail_pages(self, pending: List[School], preview_count: int = 15):
+        """Scrape individual school detail pages with preview confirmation
+
+        Runs as a pipeline of stages connected by bounded queues:
+
+        - fetch: max_workers threads download (and archive) pages, sharing the
+          HTTP client and its rate limiter
+        - parse: the raw bytes are parsed in a pool of parse_workers processes
+          (with 0, on the dispatching thread)
+        - apply: this thread copies each result onto its school, journals it
+          and handles the preview prompt
+        - write: a writer thread appends finished rows to the CSV in list order
+
+        A full queue blocks the stage feeding it, so a slow stage holds back
+        the ones before it instead of piling up pages in memory.
+        """
+        total = len(pending)
+        position = {id(school): i for i, school in enumerate(self.schools)}
+        pending_positions = {position[id(school)] for school in pending}
+        stop = threading.Event()
+        fetched = queue.Queue(maxsize=self.queue_size)
+        parsed = queue.Queue(maxsize=self.queue_size)
+
+        parse_pool = None
+        if self.parse_workers and pending:
+            parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+            # Start the worker processes now, before any threads exist, so forking them is safe
+            parse_pool.submit(int).result()
+        fetch_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        dispatcher = threading.Thread(
+            target=self._dispatch_parses, args=(fetched, parsed, parse_pool, total, stop), name="parse-dispatch"
+        )
+        writer = _RowWriter(self.csv_writer, self.queue_size)
 
+        try:
+            dispatcher.start()
+            writer.start()
+            self._row_writer = writer
+            for school in pending:
+                fetch_pool.submit(self._fetch_detail_page, school, fetched, stop)
+
+            done = set()
+            frontier = 0  # self.schools[:frontier] are final
+            for i in range(1, total + 1):
+                # Pause after preview_count schools for user confirmation;
+                # the earlier stages keep going until their queues fill
+                if i == preview_count + 1:
+                    logger.info(f"\n{'=' * 60}")
+                    logger.info(f"Preview complete: {preview_count} schools scraped")
+                    logger.info(f"Remaining: {total - preview_count} schools")
+                    logger.info("=" * 60)
+
+                    response = input("\nContinue scraping remaining schools? [Y/n]: ").strip().lower()
+                    if response in ['n', 'no']:
+                        logger.info("Scraping stopped by user. Exporting preview data...")
+                        # Trim schools list to only include scraped ones
+                        skipped = pending_positions - done
+                        self.schools = [s for j, s in enumerate(self.schools) if j not in skipped]
+                        return
+                    logger.info("\nContinuing with remaining schools...\n")
+
+                while True:
+                    try:
+                        school, outcome = parsed.get(timeout=0.5)
+                        break
+                    except queue.Empty:
+                        if not dispatcher.is_alive():
+                            raise RuntimeError("Parse stage stopped unexpectedly")
+                try:
+                    logger.info(f"[{i}/{total}] {school.name}")
+                    if isinstance(outcome, Exception):
+                        raise outcome
+                    (town, address, history), seconds = outcome.result()
+                    self.metrics.observe(
+                        "parse_duration_seconds", seconds, PARSE_BUCKETS,
+                        page="detail", parser=self.parser_backend,
+                    )
+
+                    scraped = replace(school, cutoffs=list(school.cutoffs))
+                    self._apply_detail_data(scraped, town, address, history)
+                    self.journal.record(scraped)
+                    self.schools[position[id(school)]] = scraped
+
+                    logger.info(f"  → {scraped.town}, {scraped.address}")
+
+                except Exception as e:
+                    logger.warning(f"  ⚠ Failed to scrape {school.name}: {e}")
+                    self.journal.record(school, status="failed", error=str(e))
+                    # Continue with other schools
+
+                # Results arrive in completion order; rows go out once
+                # everything before them (including restored schools) is final
+                done.add(position[id(school)])
+                while frontier < len(self.schools) and (frontier not in pending_positions or frontier in done):
+                    frontier += 1
+                self._stream_rows(frontier)
+        finally:
+            stop.set()
+            fetch_pool.shutdown(wait=True, cancel_futures=True)
+            dispatcher.join()
+            if parse_pool:
+                parse_pool.shutdown(wait=True, cancel_futures=True)
+            self._row_writer = None
+            writer.close()
+
+    def _fetch_detail_page(self, school: School, fetched: queue.Queue, stop: threading.Event):
+        """Fetch stage: download one detail page and queue its raw bytes (runs on a fetch thread)"""
+        if stop.is_set():
+            return
+        try:
+            response = self.http_client.get(school.detail_url)
+            encoding = response.encoding or response.apparent_encoding
+            if self.archive:
+                self.archive.store(school.detail_url, response.content, encoding=encoding)
+            item = (school, response.content, encoding, None)
+        except Exception as e:
+            item = (school, None, None, e)
+        _put(fetched, item, stop)
+
+    def _dispatch_parses(self, fetched, parsed, parse_pool, total, stop):
+        """Parse stage: hand fetched pages to the parse pool, queueing a future per school"""
+        for _ in range(total):
+            item = _get(fetched, stop)
+            if item is None:
+                return
+            school, body, encoding, error = item
+            if error is None:
+                outcome = Future()
+                try:
+                    if parse_pool:
+                        outcome = parse_pool.submit(_parse_detail_page, self.parser_backend, body, encoding)
+                    else:
+                        outcome.set_result(_parse_detail_page(self.parser_backend, body, encoding))
+                except Exception as e:
+                    outcome = e
+            else:
+                outcome = error
+            if not _put(parsed, (school, outcome), stop):
+                return
+
+    def _apply_detail_data(self, school: School, town, address, history):
+        """Copy parsed detail page data onto the school"""
+        self.detailed.add(school.detail_url)
+        school.town = town
+        school.address = address
+
+        # Historical cut-offs and all affiliated cut-offs come from the detail page;
+        # the current year's non-affiliated cut-offs come from the main page
+        school.apply_history(history, current_year=Config.COP_YEAR)
+
+    def reparse(self, run=None, max_workers=None):
+        """
+        Rebuild the CSV from archived pages without any network access.
+
+        Uses the pages as of the end of ``run`` (default: the latest run).
+        Detail pages are decompressed and parsed by a process pool across
+        all CPU cores.
+        """
+        try:
+            with self.recorded_run("reparse"):
+                archive = PageArchive(self.archive.root if self.archive else Config.ARCHIVE_DIR)
+                pages = archive.snapshot(run)
+                by_path = {PageArchive.path_key(url): entry for url, entry in pages.items()}
+
+                def find(url):
+                    return pages.get(url) or by_path.get(PageArchive.path_key(url))
+
+                main_page = find(Config.MAIN_PAGE_URL)
+                if main_page is None:
+                    raise ValueError(f"No archived main page in {archive.root}; run the scraper first")
+                logger.info(f"♻ Re-parsing run {main_page['run']} from {archive.root} (main page fetched {main_page['fetched_at']})")
+
+                with self.metrics.stage("main_page"):
+                    html = _decode_page(archive.load(main_page["sha256"]), main_page.get("encoding"))
+                    self.schools = MainPageParser(html).parse()
+
+                archived = [(i, find(school.detail_url)) for i, school in enumerate(self.schools)]
+                missing = [self.schools[i].name for i, entry in archived if entry is None]
+                archived = [(i, entry) for i, entry in archived if entry is not None]
+                jobs = [
+                    (archive.root, entry["sha256"], entry.get("encoding"), self.parser_backend) for _, entry in archived
+                ]
+
+                with self.metrics.stage("detail_pages"):
+                    with ProcessPoolExecutor(max_workers=max_workers or self.parse_workers or os.cpu_count()) as executor:
+                        results = executor.map(_parse_archived_page, jobs, chunksize=8)
+                        for (i, _), (town, address, history) in zip(archived, results):
+                            self._apply_detail_data(self.schools[i], town, address, history)
+
+                logger.info(f"✓ Re-parsed {len(archived)} detail pages for {len(self.schools)} schools")
+                for name in missing:
+                    logger.warning(f"  ⚠ No archived detail page for {name}")
+
+                self.export()
+        finally:
+            self.http_client.close()  # Not used, but opened by __init__
+            self._write_metrics()
+
+    @contextmanager
+    def recorded_run(self, kind: str):
+        """Record a run other than run() in the SQLite store (if any), with how it ended"""
+        self._start_store_run(kind)
+        try:
+            yield
+            self.metrics.status = "completed"
+        except KeyboardInterrupt:
+            self.metrics.status = "interrupted"
+            raise
+        except Exception:
+            self.metrics.status = "failed"
+            raise
+        finally:
+            self._close_store()
+
+    def export(self):
+        """Publish self.schools in one go (CSV, delta, columnar copies and store)"""
+        with self.metrics.stage("export"):
+            self.csv_writer.open()
+            self._rows_streamed = 0
             try:
-                logger.info(f"[{i}/{total}] {school.name}")
-
-                self.rate_limiter.wait()
-                response = self.http_client.get(school.detail_url)
-                parser = DetailPageParser(response.text)
-
-                town, address, historical_data = parser.parse()
-                school.town = town
-                school.address = address
-
-                # Update historical cut-off data (including 2025 affiliated from detail page)
-                if "2025" in historical_data:
-                    # Only update affiliated cutoffs for 2025 (non-affiliated comes from main page)
-                    school.cutoff_2025_ip_aff = historical_data["2025"].get("ip_aff")
-                    school.cutoff_2025_ip_aff_hcl = historical_data["2025"].get("ip_aff_hcl")
-                    school.cutoff_2025_pg3_aff = historical_data["2025"].get("pg3_aff")
-                    school.cutoff_2025_pg3_aff_hcl = historical_data["2025"].get("pg3_aff_hcl")
-                    school.cutoff_2025_pg2_aff = historical_data["2025"].get("pg2_aff")
-                    school.cutoff_2025_pg2_aff_hcl = historical_data["2025"].get("pg2_aff_hcl")
-                    school.cutoff_2025_pg1_aff = historical_data["2025"].get("pg1_aff")
-                    school.cutoff_2025_pg1_aff_hcl = historical_data["2025"].get("pg1_aff_hcl")
-
-                if "2024" in historical_data:
-                    school.cutoff_2024_ip = historical_data["2024"].get("ip")
-                    school.cutoff_2024_ip_hcl = historical_data["2024"].get("ip_hcl")
-                    school.cutoff_2024_pg3 = historical_data["2024"].get("pg3")
-                    school.cutoff_2024_pg2 = historical_data["2024"].get("pg2")
-                    school.cutoff_2024_pg1 = historical_data["2024"].get("pg1")
-                    # Affiliated cutoffs
-                    school.cutoff_2024_ip_aff = historical_data["2024"].get("ip_aff")
-                    school.cutoff_2024_ip_aff_hcl = historical_data["2024"].get("ip_aff_hcl")
-                    school.cutoff_2024_pg3_aff = historical_data["2024"].get("pg3_aff")
-                    school.cutoff_2024_pg3_aff_hcl = historical_data["2024"].get("pg3_aff_hcl")
-                    school.cutoff_2024_pg2_aff = historical_data["2024"].get("pg2_aff")
-                    school.cutoff_2024_pg2_aff_hcl = historical_data["2024"].get("pg2_aff_hcl")
-                    school.cutoff_2024_pg1_aff = historical_data["2024"].get("pg1_aff")
-                    school.cutoff_2024_pg1_aff_hcl = historical_data["2024"].get("pg1_aff_hcl")
-
-                if "2023" in historical_data:
-                    school.cutoff_2023_ip = historical_data["2023"].get("ip")
-                    school.cutoff_2023_ip_hcl = historical_data["2023"].get("ip_hcl")
-                    school.cutoff_2023_pg3 = historical_data["2023"].get("pg3")
-                    school.cutoff_2023_pg2 = historical_data["2023"].get("pg2")
-                    school.cutoff_2023_pg1 = historical_data["2023"].get("pg1")
-                    # Affiliated cutoffs
-                    school.cutoff_2023_ip_aff = historical_data["2023"].get("ip_aff")
-                    school.cutoff_2023_ip_aff_hcl = historical_data["2023"].get("ip_aff_hcl")
-                    school.cutoff_2023_pg3_aff = historical_data["2023"].get("pg3_aff")
-                    school.cutoff_2023_pg3_aff_hcl = historical_data["2023"].get("pg3_aff_hcl")
-                    school.cutoff_2023_pg2_aff = historical_data["2023"].get("pg2_aff")
-                    school.cutoff_2023_pg2_aff_hcl = historical_data["2023"].get("pg2_aff_hcl")
-                    school.cutoff_2023_pg1_aff = historical_data["2023"].get("pg1_aff")
-                    school.cutoff_2023_pg1_aff_hcl = historical_data["2023"].get("pg1_aff_hcl")
-
-                logger.info(f"  → {town}, {address}")
-
-            except Exception as e:
-                logger.warning(f"  ⚠ Failed to scrape {school.name}: {e}")
-                # Continue with other schools
-                continue
+                self._export_to_csv()
+            finally:
+                self.csv_writer.close()
+
+    def _stream_rows(self, end: int):
+        """Append self.schools[:end] to the CSV, skipping rows already written"""
+        for school in self.schools[self._rows_streamed:end]:
+            (self._row_writer or self.csv_writer).append(school)
+        self._rows_streamed = max(self._rows_streamed, end)
 
     def _export_to_csv(self):
-        """Export scraped data to CSV"""
-        writer = CSVWriter(Config.OUTPUT_FILE)
-        writer.write(self.schools)
+        """Write any remaining rows and atomically publish the CSV"""
+        # Trimming after the preview only drops schools past the streamed prefix
+        self._stream_rows(len(self.schools))
+        previous = load_snapshot(Config.OUTPUT_FILE) if Config.DELTA_FILE else None
+        self.csv_writer.commit()
+        if previous is not None:
+            self._write_delta(*previous)
+        if self.store:
+            self.store.upsert_schools(self.schools, self.store_run_id, detailed=self.detailed)
+            logger.info(f"✓ Saved {len(self.schools)} schools to {self.store.path} (run {self.store_run_id})")
+
+        if Config.COLUMNAR_EXPORT:
+            export_columnar(Config.OUTPUT_FILE, *load_rows(Config.OUTPUT_FILE, columnar=False))
+            logger.info(f"✓ Wrote typed copies: {', '.join(columnar_paths(Config.OUTPUT_FILE))}")
+        if Config.DERIVED_FILE:
+            with self.metrics.stage("derived_metrics"):
+                count = write_derived_metrics(Config.OUTPUT_FILE, Config.DERIVED_FILE)
+            logger.info(f"✓ Wrote derived metrics for {count} schools to {Config.DERIVED_FILE}")
+
+    def _write_delta(self, old_fieldnames, old_rows):
+        """Diff the published CSV against the one it replaced and write the delta file"""
+        new_fieldnames, new_rows = load_snapshot(Config.OUTPUT_FILE)
+        diff = diff_snapshots(old_rows, new_rows.values(), old_fieldnames, new_fieldnames)
+        diff.write(Config.DELTA_FILE)
+        self.metrics.extra["delta"] = diff.to_dict()["summary"]
+        summary = diff.summary()
+        logger.info(f"Δ Changes since the previous snapshot: {summary[0]} ({Config.DELTA_FILE})")
+        for line in summary[1:]:
+            logger.info(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape secondary school cut-off points")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"Reuse schools already recorded in {Config.JOURNAL_FILE} and only fetch missing or failed ones",
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=Config.MAX_WORKERS,
+        help=f"Concurrent detail page fetches (default: {Config.MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=sorted(DETAIL_PARSER_BACKENDS),
+        default=Config.PARSER_BACKEND,
+        help=f"Detail page parser backend (default: {Config.PARSER_BACKEND})",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=Config.PARSE_WORKERS,
+        help=f"Processes parsing detail pages; 0 parses on a thread (default: {Config.PARSE_WORKERS})",
+    )
+    parser.add_argument(
+        "--reparse",
+        nargs="?",
+        const="",
+        metavar="RUN",
+        help=f"Rebuild the CSV offline from the pages archived in {Config.ARCHIVE_DIR} "
+        "by a run (default: the latest), parsing on all CPU cores",
+    )
+    args = parser.parse_args()
+
+    scraper = SchoolScraper(
+        max_workers=args.workers,
+        resume=args.resume,
+        parser_backend=args.parser,
+        parse_workers=args.parse_workers,
+    )
+    if args.reparse is not None:
+        scraper.reparse(run=args.reparse or None)
+    else:
+        scraper.run()
 
 
 if __name__ == "__main__":
-    scraper = SchoolScraper()
-    scraper.run()
+    main()
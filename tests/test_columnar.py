@@ -0,0 +1,33 @@
+import pyarrow as pa
+from utils.columnar import ColumnarWriter, read_arrow, rows_to_table, table_to_rows
+
+FIELDNAMES = ["School Name", "Town", "2025_IP"]
+
+
+def _write(tmp_path, rows, batch_size):
+    writer = ColumnarWriter(str(tmp_path / "schools.csv"), batch_size=batch_size)
+    writer.open(FIELDNAMES)
+    for row in rows:
+        writer.append(row)
+    writer.commit()
+    return read_arrow(writer.arrow_path)
+
+
+def test_later_batch_that_no_longer_fits_falls_back_to_string(tmp_path):
+    rows = [
+        {"School Name": f"School {i}", "Town": town, "2025_IP": score}
+        for i, (town, score) in enumerate([("Bedok", "1"), ("Bishan", "2"), ("Bedok", "Aff"), ("Yishun", "3")])
+    ]
+    table = _write(tmp_path, rows, batch_size=2)
+
+    assert table.schema.field("2025_IP").type == pa.string()
+    assert table.schema == rows_to_table(FIELDNAMES, rows).schema
+    assert table_to_rows(table) == (FIELDNAMES, rows)
+
+
+def test_columns_that_fit_every_batch_stay_typed(tmp_path):
+    rows = [{"School Name": f"School {i}", "Town": "Bedok", "2025_IP": str(i)} for i in range(5)]
+    table = _write(tmp_path, rows, batch_size=2)
+
+    assert table.schema.field("2025_IP").type == pa.int8()
+    assert table_to_rows(table) == (FIELDNAMES, rows)
@@ -0,0 +1,51 @@
+import pytest
+from benchmarks.run import CUTOFF_CELLS
+from models.cutoff import EMPTY_CELL, CutoffBound as B, CutoffCell, parse_cutoff_cell
+
+# Raw cell -> (main_min, main_max, affiliated_min, affiliated_max); the HCL grade is each bound's grade
+CASES = {
+    # Main cut-off only
+    "8": CutoffCell(None, B("8")),
+    "22": CutoffCell(None, B("22")),
+    "6M": CutoffCell(None, B("6", "M")),
+    "7M-": CutoffCell(None, B("7", "M")),
+    "7-": CutoffCell(None, B("7")),
+    # Main cut-off followed by the affiliated cut-off
+    "6M8M": CutoffCell(None, B("6", "M"), None, B("8", "M")),
+    "6M 8M": CutoffCell(None, B("6", "M"), None, B("8", "M")),
+    "713": CutoffCell(None, B("7"), None, B("13")),
+    "2125": CutoffCell(None, B("21"), None, B("25")),
+    # Main range
+    "12 - 16": CutoffCell(B("12"), B("16")),
+    "6M- 8M": CutoffCell(B("6", "M"), B("8", "M")),
+    # Main range and affiliated range, with the middle bounds run together
+    "5 - 910 - 22": CutoffCell(B("5"), B("9"), B("10"), B("22")),
+    "5 - 9M8M- 12": CutoffCell(B("5"), B("9", "M"), B("8", "M"), B("12")),
+    "4 - 6M6M - 8M": CutoffCell(B("4"), B("6", "M"), B("6", "M"), B("8", "M")),
+    "1 - 2022 - 25": CutoffCell(B("1"), B("20"), B("22"), B("25")),
+    "10 - 1112 - 20": CutoffCell(B("10"), B("11"), B("12"), B("20")),
+    # No data
+    "-": EMPTY_CELL,
+    "": EMPTY_CELL,
+}
+
+
+def test_every_benchmark_cell_has_a_case():
+    assert set(CUTOFF_CELLS) <= set(CASES)
+
+
+@pytest.mark.parametrize("raw, expected", CASES.items(), ids=[repr(raw) for raw in CASES])
+def test_parse_cutoff_cell(raw, expected):
+    assert parse_cutoff_cell(raw) == expected
+
+
+@pytest.mark.parametrize("raw, main, affiliated", [
+    ("6M8M", ("6", "M"), ("8", "M")),
+    ("5 - 9M8M- 12", ("9", "M"), ("12", None)),
+    ("713", ("7", None), ("13", None)),
+    ("7M-", ("7", "M"), (None, None)),
+    (None, (None, None), (None, None)),
+])
+def test_main_and_affiliated_cutoffs(raw, main, affiliated):
+    cell = parse_cutoff_cell(raw)
+    assert (cell.main, cell.affiliated) == (main, affiliated)
@@ -0,0 +1,30 @@
+import os
+import pytest
+from models.cutoff import CutoffRecord
+from parsers import DETAIL_PARSER_BACKENDS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", sorted(DETAIL_PARSER_BACKENDS))
+def test_script_style_and_template_text_is_ignored(backend):
+    town, address, history = DETAIL_PARSER_BACKENDS[backend](_read("detail_inline_script.html")).parse()
+
+    assert town == "BukitMerah"
+    assert address == "12 Jalan Bukit Merah, Singapore 150012"
+    assert history[:2] == [
+        CutoffRecord(2025, "IP", False, "6"),
+        CutoffRecord(2025, "PG3", False, "12"),
+    ]
+    assert CutoffRecord(2024, "PG3", False, "13") in history
+
+
+def test_backends_agree():
+    html = _read("detail_inline_script.html")
+    results = {name: parser(html).parse() for name, parser in DETAIL_PARSER_BACKENDS.items()}
+    assert len({repr(result) for result in results.values()}) == 1, results
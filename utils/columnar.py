@@ -0,0 +1,370 @@
+"""
+Typed columnar copies of the schools CSV: Arrow IPC for handing data
+between pipeline stages (memory-mapped on load, no text parsing) and
+Parquet for archival.
+
+CSV text converts losslessly to typed columns and back. Cut-off scores
+become int8, HCL grades and repeated labels are dictionary-encoded,
+coordinates become float64, HMT flags become bool and scrape timestamps
+become timestamps. Derived metrics (enrichment/derived.py) become int8
+or float64. Each typed field records its CSV missing marker (e.g.
+"-") in the field metadata. A column that does not round-trip exactly
+stays a string column.
+
+ColumnarWriter streams rows into both copies in record batches, so a
+pipeline can write them without holding the whole file in memory.
+"""
+
+import csv
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ARROW_SUFFIX = ".arrow"
+PARQUET_SUFFIX = ".parquet"
+BATCH_SIZE = 1024  # Rows per record batch when streaming
+
+_SCORE_COLUMN = re.compile(r"^\d{4}_(IP|PG\d)(_Aff)?$")
+_GRADE_COLUMN = re.compile(r"^\d{4}_\w+_HCL$")
+_METRIC_SCORE_COLUMN = re.compile(r"^(IP|PG\d)(_Aff)?_(Max|Min|YoY_\d{4})$")
+_METRIC_COLUMN = re.compile(r"^(IP|PG\d)(_Aff)?_(Slope|Volatility)$")
+
+Rows = List[Dict[str, str]]
+
+
+@dataclass(frozen=True)
+class _Codec:
+    """How a CSV column maps to a typed Arrow column"""
+
+    arrow_type: pa.DataType
+    missing: Optional[str]  # CSV text stored as null (None: column has no nulls)
+    parse: Callable[[str], object]
+    format: Callable[[object], str]
+
+
+_SCORE = _Codec(pa.int8(), "-", int, str)
+_GRADE = _Codec(pa.dictionary(pa.int8(), pa.string()), "-", str, str)
+_LABEL = _Codec(pa.dictionary(pa.int32(), pa.string()), None, str, str)
+_COORDINATE = _Codec(pa.float64(), "", float, repr)
+_METRIC = _Codec(pa.float64(), "-", float, repr)
+_FLAG = _Codec(pa.bool_(), "", {"Y": True, "-": False}.__getitem__, lambda flag: "Y" if flag else "-")
+_TIMESTAMP = _Codec(pa.timestamp("us"), "", datetime.fromisoformat, datetime.isoformat)
+
+
+def _codec_for(column: str) -> Optional[_Codec]:
+    if _SCORE_COLUMN.match(column) or _METRIC_SCORE_COLUMN.match(column):
+        return _SCORE
+    if _METRIC_COLUMN.match(column):
+        return _METRIC
+    if _GRADE_COLUMN.match(column):
+        return _GRADE
+    if column in ("Latitude", "Longitude"):
+        return _COORDINATE
+    if column in ("HCL", "HTL", "HML"):
+        return _FLAG
+    if column == "Scrape Timestamp":
+        return _TIMESTAMP
+    if column in ("Gender", "Town"):
+        return _LABEL
+    return None
+
+
+def _parse(codec: _Codec, values: List[str]) -> Optional[list]:
+    """Typed values for a column, or None if the text would not round-trip exactly"""
+    try:
+        parsed = [None if value == codec.missing else codec.parse(value) for value in values]
+    except (ValueError, KeyError, TypeError, OverflowError):
+        return None
+    if all(p is None or codec.format(p) == value for p, value in zip(parsed, values)):
+        return parsed
+    return None
+
+
+def _encode(column: str, values: List[str]) -> Tuple[pa.Field, pa.Array]:
+    """Typed field and array for one CSV column, or a string column if it does not round-trip"""
+    codec = _codec_for(column)
+    if codec is not None:
+        parsed = _parse(codec, values)
+        if parsed is not None:
+            try:
+                array = pa.array(parsed, type=codec.arrow_type)
+            except pa.ArrowException:
+                pass
+            else:
+                metadata = {"missing": codec.missing} if codec.missing is not None else None
+                return pa.field(column, array.type, metadata=metadata), array
+    return pa.field(column, pa.string()), pa.array(values, type=pa.string())
+
+
+def _decode(field: pa.Field, column: pa.ChunkedArray) -> List[str]:
+    """CSV text for one Arrow column"""
+    values = column.to_pylist()
+    if pa.types.is_string(field.type):
+        return values
+    codec = _codec_for(field.name)
+    missing = (field.metadata or {}).get(b"missing", b"").decode()
+    return [missing if value is None else codec.format(value) for value in values]
+
+
+def rows_to_table(fieldnames: List[str], rows: Rows) -> pa.Table:
+    """Typed table from CSV-style rows (values are stringified as the CSV module would)"""
+    fields, arrays = [], []
+    for column in dict.fromkeys(fieldnames):  # Drop duplicate header names
+        values = ["" if row.get(column) is None else str(row[column]) for row in rows]
+        field, array = _encode(column, values)
+        fields.append(field)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def table_to_rows(table: pa.Table) -> Tuple[List[str], Rows]:
+    """CSV header and rows for a table, with the exact text it was built from"""
+    columns = {field.name: _decode(field, table.column(field.name)) for field in table.schema}
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    return list(columns), rows
+
+
+def _replace_atomically(path: str, write: Callable[[str], None]):
+    """Write to <path>.partial, then rename over path"""
+    partial_path = f"{path}.partial"
+    write(partial_path)
+    os.replace(partial_path, path)
+
+
+def write_arrow(table: pa.Table, path: str):
+    """Write an uncompressed Arrow IPC file, so readers can memory-map it"""
+    def write(partial_path):
+        with pa.OSFile(partial_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    _replace_atomically(path, write)
+
+
+def read_arrow(path: str) -> pa.Table:
+    """Memory-map an Arrow IPC file; columns are read lazily from the page cache"""
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def write_parquet(table: pa.Table, path: str):
+    """Write a zstd-compressed Parquet file for archival"""
+    _replace_atomically(path, lambda partial_path: pq.write_table(table, partial_path, compression="zstd"))
+
+
+def columnar_paths(csv_path: str) -> Tuple[str, str]:
+    """Arrow and Parquet siblings of a CSV file"""
+    base = Path(csv_path).with_suffix("")
+    return f"{base}{ARROW_SUFFIX}", f"{base}{PARQUET_SUFFIX}"
+
+
+def export_columnar(csv_path: str, fieldnames: List[str], rows: Rows):
+    """Write the Arrow and Parquet siblings of a CSV file"""
+    arrow_path, parquet_path = columnar_paths(csv_path)
+    table = rows_to_table(fieldnames, rows)
+    write_arrow(table, arrow_path)
+    write_parquet(table, parquet_path)
+
+
+def _fresh_arrow(path: str, columnar: bool) -> Optional[str]:
+    """The Arrow file to read for path: path itself, or a CSV's sibling if columnar and at least as new"""
+    arrow_path = path if path.endswith(ARROW_SUFFIX) else columnar_paths(path)[0]
+    if (columnar or arrow_path == path) and os.path.exists(arrow_path) and (
+        arrow_path == path or os.path.getmtime(arrow_path) >= os.path.getmtime(path)
+    ):
+        return arrow_path
+    return None
+
+
+def load_rows(path: str, columnar: bool = True) -> Tuple[List[str], Rows]:
+    """
+    CSV header and rows from an Arrow file or a CSV file. With columnar
+    set, a CSV's Arrow sibling is memory-mapped in its place when it is at
+    least as new.
+    """
+    arrow_path = _fresh_arrow(path, columnar)
+    if arrow_path:
+        return table_to_rows(read_arrow(arrow_path))
+
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return list(reader.fieldnames), list(reader)
+
+
+@contextmanager
+def stream_rows(path: str, columnar: bool = True):
+    """
+    Like load_rows, but yields (header, row iterator) and reads one CSV row
+    or one Arrow record batch at a time.
+    """
+    arrow_path = _fresh_arrow(path, columnar)
+    if arrow_path:
+        with pa.memory_map(arrow_path, "r") as source:
+            reader = pa.ipc.open_file(source)
+
+            def batches() -> Iterator[Dict[str, str]]:
+                for i in range(reader.num_record_batches):
+                    yield from table_to_rows(pa.Table.from_batches([reader.get_batch(i)], reader.schema))[1]
+
+            yield reader.schema.names, batches()
+        return
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        yield list(reader.fieldnames or []), iter(reader)
+
+
+def save_rows(path: str, fieldnames: List[str], rows: Rows, columnar: bool = True):
+    """Write rows to CSV, plus Arrow and Parquet siblings when columnar is set"""
+    def write(partial_path):
+        with open(partial_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    _replace_atomically(path, write)
+    if columnar:
+        export_columnar(path, fieldnames, rows)
+
+
+class ColumnarWriter:
+    """
+    Streams rows into the Arrow and Parquet siblings of a CSV file.
+
+    Rows are encoded BATCH_SIZE at a time. The first batch sets the
+    schema (with the same round-trip fallback as rows_to_table). If a
+    later batch no longer fits a typed column, that column becomes a
+    string column and the batches already written are rewritten, so the
+    result matches rows_to_table on the whole file. Dictionary columns
+    share one growing dictionary, written to the Arrow file as deltas.
+    Both files are written to .partial paths and renamed into place by
+    commit().
+    """
+
+    def __init__(self, csv_path: str, batch_size: int = BATCH_SIZE):
+        self.arrow_path, self.parquet_path = columnar_paths(csv_path)
+        self.batch_size = batch_size
+        self.fieldnames: List[str] = []
+        self.schema: Optional[pa.Schema] = None
+        self._batch: Rows = []
+        self._dictionaries: Dict[str, Dict[str, int]] = {}
+        self._arrow_file = None
+        self._arrow_writer = None
+        self._parquet_writer = None
+
+    def open(self, fieldnames: List[str]):
+        self.fieldnames = list(dict.fromkeys(fieldnames))  # Drop duplicate header names
+
+    def append(self, row: Dict[str, str]):
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self._write_batch()
+
+    def _encode_batch(self, rows: Rows) -> pa.RecordBatch:
+        columns = {
+            column: ["" if row.get(column) is None else str(row[column]) for row in rows]
+            for column in self.fieldnames
+        }
+        if self.schema is None:
+            self.schema = pa.schema([_encode(column, values)[0] for column, values in columns.items()])
+
+        arrays, misfits = {}, []
+        for field in self.schema:
+            values = columns[field.name]
+            if pa.types.is_string(field.type):
+                arrays[field.name] = pa.array(values, type=pa.string())
+                continue
+            array = self._encode_typed(field, values)
+            if array is None:
+                misfits.append(field.name)
+                arrays[field.name] = pa.array(values, type=pa.string())
+            else:
+                arrays[field.name] = array
+        if misfits:
+            self._widen(misfits)
+        return pa.RecordBatch.from_arrays([arrays[field.name] for field in self.schema], schema=self.schema)
+
+    def _encode_typed(self, field: pa.Field, values: List[str]) -> Optional[pa.Array]:
+        """Typed array for a batch of a column, or None if the values don't fit the column's type"""
+        parsed = _parse(_codec_for(field.name), values)
+        if parsed is None:
+            return None
+        if not pa.types.is_dictionary(field.type):
+            try:
+                return pa.array(parsed, type=field.type)
+            except pa.ArrowException:
+                return None
+        # Append-only dictionary, so each batch's dictionary extends the last
+        dictionary = dict(self._dictionaries.get(field.name, {}))
+        indices = [None if value is None else dictionary.setdefault(value, len(dictionary)) for value in parsed]
+        try:
+            index_array = pa.array(indices, type=field.type.index_type)
+        except pa.ArrowException:  # More distinct values than the index type holds
+            return None
+        self._dictionaries[field.name] = dictionary
+        return pa.DictionaryArray.from_arrays(index_array, pa.array(list(dictionary), type=pa.string()))
+
+    def _widen(self, columns: List[str]):
+        """Make columns string columns, rewriting any batches already written"""
+        self.schema = pa.schema([
+            pa.field(field.name, pa.string()) if field.name in columns else field for field in self.schema
+        ])
+        for column in columns:
+            self._dictionaries.pop(column, None)
+        if self._arrow_writer is None:
+            return
+
+        self.close()
+        written_path = f"{self.arrow_path}.partial"
+        old_path = f"{written_path}.old"
+        os.replace(written_path, old_path)
+        self._open_writers()
+        with pa.memory_map(old_path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                arrays = [
+                    pa.array(_decode(old_field, batch.column(old_field.name)), type=pa.string())
+                    if old_field.name in columns else batch.column(old_field.name)
+                    for old_field in batch.schema
+                ]
+                rewritten = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+                self._arrow_writer.write_batch(rewritten)
+                self._parquet_writer.write_batch(rewritten)
+        os.remove(old_path)
+
+    def _open_writers(self):
+        self._arrow_file = pa.OSFile(f"{self.arrow_path}.partial", "wb")
+        self._arrow_writer = pa.ipc.new_file(
+            self._arrow_file, self.schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        )
+        self._parquet_writer = pq.ParquetWriter(f"{self.parquet_path}.partial", self.schema, compression="zstd")
+
+    def _write_batch(self):
+        batch = self._encode_batch(self._batch)
+        self._batch = []
+        if self._arrow_writer is None:
+            self._open_writers()
+        self._arrow_writer.write_batch(batch)
+        self._parquet_writer.write_batch(batch)
+
+    def commit(self):
+        """Write the last batch and move both files into place"""
+        if self._batch or self._arrow_writer is None:
+            self._write_batch()
+        self.close()
+        os.replace(f"{self.arrow_path}.partial", self.arrow_path)
+        os.replace(f"{self.parquet_path}.partial", self.parquet_path)
+
+    def close(self):
+        """Close the files, leaving any uncommitted output in the .partial files"""
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            self._arrow_file.close()
+            self._parquet_writer.close()
+            self._arrow_writer = self._arrow_file = self._parquet_writer = None
@@ -1,14 +1,33 @@
 import csv
 import os
-from typing import List
-from models.school import School
+from typing import Dict, List, Optional
+from config import Config
+from models.school import School, csv_fieldnames, export_years
 
 
 class CSVWriter:
-    """Handle CSV export with proper formatting"""
+    """Handle CSV export with proper formatting
 
-    def __init__(self, output_path: str):
+    Rows are streamed to ``<output_path>.partial`` under a fixed header and
+    flushed every ``flush_every`` rows, so progress can be inspected while
+    a scrape runs. commit() fsyncs the partial file and atomically renames
+    it over the output path; until then the previous output is untouched,
+    and a crash leaves it intact alongside the readable partial file.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        years: Optional[List[int]] = None,
+        flush_every: int = Config.CSV_FLUSH_EVERY,
+    ):
         self.output_path = output_path
+        self.partial_path = f"{output_path}.partial"
+        self.years = years
+        self.flush_every = max(1, flush_every)
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
         self._ensure_directory()
 
     def _ensure_directory(self):
@@ -17,19 +36,66 @@ class CSVWriter:
         if directory and not os.path.exists(directory):
             os.makedirs(directory)
 
-    def write(self, schools: List[School]):
-        """Write schools to CSV file"""
-        if not schools:
+    def __enter__(self) -> "CSVWriter":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.close()
+
+    def open(self):
+        """Start a new partial file and write the header (years default to Config.EXPORT_YEARS)"""
+        if self.years is None:
+            self.years = list(Config.EXPORT_YEARS)
+        self._file = open(self.partial_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=csv_fieldnames(self.years))
+        self._writer.writeheader()
+        self.rows_written = 0
+
+    def append(self, school: School):
+        """Write one school as the next row"""
+        self._write_row(school.to_dict(self.years))
+
+    def _write_row(self, row: Dict[str, str]):
+        self._writer.writerow(row)
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self._file.flush()
+
+    def commit(self):
+        """Make the partial file durable and atomically replace the output with it"""
+        if self._file is None:
+            raise RuntimeError("CSV writer is not open")
+        if not self.rows_written:
+            self.close()
             raise ValueError("No schools to write")
 
-        with open(self.output_path, "w", newline="", encoding="utf-8") as f:
-            # Get fieldnames from first school
-            fieldnames = list(schools[0].to_dict().keys())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.close()
+        os.replace(self.partial_path, self.output_path)
 
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+        print(f"✓ Exported {self.rows_written} schools to {self.output_path}")
 
-            for school in schools:
-                writer.writerow(school.to_dict())
+    def close(self):
+        """Close the partial file without publishing it"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def write(self, schools: List[School], years: Optional[List[int]] = None):
+        """
+        Write schools to CSV file in one go, with cut-off columns for the
+        given years (default: every year in the data)
+        """
+        if not schools:
+            raise ValueError("No schools to write")
 
-        print(f"✓ Exported {len(schools)} schools to {self.output_path}")
+        self.years = years or self.years or export_years(schools)
+        with self:
+            for school in schools:
+                self._write_row(school.to_dict(self.years))
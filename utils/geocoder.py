@@ -0,0 +1,225 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode
+from config import Config
+from utils.http_client import HTTPClient
+from utils.rate_limiter import RateLimiter
+
+Point = Tuple[float, float]  # (latitude, longitude)
+
+_SEPARATORS = re.compile(r"[\s,]+")
+
+
+def normalize_address(address: str) -> str:
+    """Cache key for an address: case, commas and runs of whitespace don't matter"""
+    return _SEPARATORS.sub(" ", address).strip().casefold()
+
+
+class OneMapGeocoder:
+    """Geocodes one address with a OneMap-compatible search endpoint
+
+    Any server answering ``GET <search_url>?searchVal=...`` with OneMap's
+    JSON (``found`` and ``results[].LATITUDE/LONGITUDE``) can stand in for
+    OneMap, e.g. a local fixture server.
+    """
+
+    def __init__(self, search_url: str = Config.GEOCODER_URL, http_client: Optional[HTTPClient] = None):
+        self.search_url = search_url
+        self.http_client = http_client or HTTPClient(
+            pool_size=Config.GEOCODE_WORKERS,
+            rate_limiter=RateLimiter(delay=1.0 / Config.GEOCODE_RATE, max_rate=Config.GEOCODE_RATE),
+        )
+
+    def geocode(self, address: str) -> Optional[Point]:
+        """Coordinates of the best match, or None if nothing matched"""
+        query = urlencode(
+            {"searchVal": address, "returnGeom": "Y", "getAddrDetails": "Y", "pageNum": 1}
+        )
+        data = self.http_client.get(f"{self.search_url}?{query}").json()
+        if data.get("found", 0) > 0 and data.get("results"):
+            result = data["results"][0]
+            return float(result["LATITUDE"]), float(result["LONGITUDE"])
+        return None
+
+    def close(self):
+        self.http_client.close()
+
+
+class GeocodeCache:
+    """Persistent geocoding results keyed by normalized address
+
+    Addresses that were looked up but not found are cached too, so they are
+    not retried on every run; pass retry_missing to BatchGeocoder to retry.
+    """
+
+    def __init__(self, path: str = Config.GEOCODE_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, address: str) -> Optional[dict]:
+        return self.entries.get(normalize_address(address))
+
+    def put(self, address: str, point: Optional[Point]):
+        entry = {
+            "address": address,
+            "found": point is not None,
+            "latitude": point[0] if point else None,
+            "longitude": point[1] if point else None,
+            "geocoded_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self.entries[normalize_address(address)] = entry
+
+    def save(self):
+        """Write the cache to disk atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = json.dumps(self.entries, indent=2, ensure_ascii=False, sort_keys=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+class BatchGeocoder:
+    """Resolves many addresses, fetching only cache misses, a few at a time
+
+    Misses are geocoded by a pool of ``max_workers`` threads sharing one
+    rate-limited HTTP client. Lookups that fail (network errors, bad
+    responses) are reported but not cached, so the next run retries them.
+    """
+
+    def __init__(
+        self,
+        geocoder: Optional[OneMapGeocoder] = None,
+        cache: Optional[GeocodeCache] = None,
+        max_workers: int = Config.GEOCODE_WORKERS,
+        retry_missing: bool = False,
+    ):
+        self.geocoder = geocoder or OneMapGeocoder()
+        self.cache = cache or GeocodeCache()
+        self.max_workers = max(1, max_workers)
+        self.retry_missing = retry_missing
+        self.stats = {"cached": 0, "geocoded": 0, "not_found": 0, "failed": 0}
+        self.errors: Dict[str, str] = {}  # Normalized address -> error from the last failed lookup
+
+    def _needs_lookup(self, address: str) -> bool:
+        entry = self.cache.get(address)
+        return entry is None or (self.retry_missing and not entry["found"])
+
+    def _lookup(self, address: str):
+        try:
+            point = self.geocoder.geocode(address)
+        except Exception as e:
+            self.errors[normalize_address(address)] = str(e)
+            return
+        self.errors.pop(normalize_address(address), None)
+        self.cache.put(address, point)
+
+    def failed(self, address: str) -> bool:
+        """Whether the last lookup of this address failed (rather than finding nothing)"""
+        return normalize_address(address) in self.errors
+
+    def resolve(self, addresses: Iterable[str]) -> Dict[str, Optional[Point]]:
+        """Coordinates for each address (None if not found or the lookup failed)"""
+        addresses = [address for address in addresses if address]
+        # One lookup per normalized address
+        unique = {}
+        for address in addresses:
+            unique.setdefault(normalize_address(address), address)
+
+        misses = [address for address in unique.values() if self._needs_lookup(address)]
+        self.stats["cached"] += len(unique) - len(misses)
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(self._lookup, misses))
+            self.cache.save()
+
+        for address in misses:
+            if self.failed(address):
+                self.stats["failed"] += 1
+            elif self.cache.get(address)["found"]:
+                self.stats["geocoded"] += 1
+            else:
+                self.stats["not_found"] += 1
+
+        results = {}
+        for address in addresses:
+            entry = self.cache.get(address)
+            if entry is None or self.failed(address) or not entry["found"]:
+                results[address] = None
+            else:
+                results[address] = (entry["latitude"], entry["longitude"])
+        return results
+
+    def close(self):
+        self.geocoder.close()
+
+
+def update_school_coordinates(
+    schools: Dict[str, str],
+    coords_file: str = Config.COORDINATES_FILE,
+    batch_geocoder: Optional[BatchGeocoder] = None,
+) -> Dict[str, dict]:
+    """
+    Bring the school coordinates file up to date for {school name: address}.
+
+    A school is (re)geocoded only when it has no coordinates or its address
+    differs from the one its coordinates were resolved from; entries written
+    before addresses were recorded are kept as they are. Returns the
+    updated coordinates, also written to coords_file.
+    """
+    coordinates = {}
+    if os.path.exists(coords_file):
+        with open(coords_file, "r", encoding="utf-8") as f:
+            coordinates = json.load(f)
+
+    stale = {}
+    for name, address in schools.items():
+        if not address or address == "N/A":
+            continue
+        entry = coordinates.get(name)
+        if entry is None:
+            stale[name] = address
+        elif "address" not in entry:
+            entry["address"] = address  # Trust pre-existing coordinates
+        elif normalize_address(entry["address"]) != normalize_address(address):
+            stale[name] = address
+
+    if stale:
+        owned = batch_geocoder is None
+        batch_geocoder = batch_geocoder or BatchGeocoder()
+        try:
+            resolved = batch_geocoder.resolve(stale.values())
+        finally:
+            if owned:
+                batch_geocoder.close()
+
+        for name, address in stale.items():
+            point = resolved.get(address)
+            if point:
+                coordinates[name] = {"latitude": point[0], "longitude": point[1], "address": address}
+            elif not batch_geocoder.failed(address):
+                coordinates.pop(name, None)  # Not found; old coordinates belong to the old address
+            # Failed lookups leave the entry stale, so the next run retries them
+
+    directory = os.path.dirname(coords_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{coords_file}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(coordinates, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, coords_file)
+    return coordinates
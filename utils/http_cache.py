@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+from config import Config
+
+# Response headers kept with each cached body
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class HTTPCache:
+    """On-disk cache of GET responses with conditional revalidation
+
+    Bodies are stored one file per URL next to a JSON index holding the
+    validators (ETag / Last-Modified). Entries younger than ``ttl`` are
+    served without touching the network (with the default ttl of 0, every
+    request is revalidated); older ones are revalidated with
+    If-None-Match / If-Modified-Since and a 304 serves the stored body,
+    refreshing the entry's validators and age.
+    The least recently used entries are evicted above ``max_bytes``.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self,
+        cache_dir: str = Config.CACHE_DIR,
+        ttl: float = Config.CACHE_TTL,
+        max_bytes: int = Config.CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "evictions": 0,
+            "bytes_saved": 0,
+            "bytes_downloaded": 0,
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index: Dict[str, dict] = self._load_index()
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, self.INDEX_FILE)
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose body file has gone missing
+        return {
+            key: entry
+            for key, entry in index.items()
+            if os.path.exists(self._body_path(key))
+        }
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Return the cache entry for a URL, if any"""
+        with self._lock:
+            return self.index.get(self._key(url))
+
+    def is_fresh(self, entry: dict) -> bool:
+        """Whether an entry can be served without revalidation"""
+        return time.time() - entry["stored_at"] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> Dict[str, str]:
+        """Validator headers for a conditional GET of a cached entry"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def serve(
+        self, url: str, entry: dict, not_modified: Optional[requests.Response] = None
+    ) -> Optional[requests.Response]:
+        """Build a response from the stored body, counting it as a hit
+
+        Pass the 304 response when serving after a revalidation: the entry
+        takes any new validators and headers from it and counts as fresh
+        again. Returns None (and forgets the entry) if the body file is
+        missing.
+        """
+        key = self._key(url)
+        try:
+            with open(self._body_path(key), "rb") as f:
+                body = f.read()
+        except OSError:
+            with self._lock:
+                self.index.pop(key, None)
+            return None
+
+        with self._lock:
+            entry["accessed_at"] = time.time()
+            if not_modified is not None:
+                self._refresh(entry, not_modified)
+                self.stats["revalidated"] += 1
+            else:
+                self.stats["hits"] += 1
+            self.stats["bytes_saved"] += len(body)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response.encoding = entry.get("encoding")
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.from_cache = True
+        return response
+
+    @staticmethod
+    def _refresh(entry: dict, not_modified: requests.Response):
+        """Update an entry from a 304 response, which may carry new validators (lock held)"""
+        entry["stored_at"] = entry["accessed_at"]
+        for name, field in (("ETag", "etag"), ("Last-Modified", "last_modified")):
+            value = not_modified.headers.get(name)
+            if value:
+                entry[field] = value
+                entry.setdefault("headers", {})[name] = value
+
+    def store(self, url: str, response: requests.Response):
+        """Save a full 200 response and evict old entries if over budget"""
+        key = self._key(url)
+        body = response.content
+        body_path = self._body_path(key)
+        tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, body_path)
+
+        now = time.time()
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["bytes_downloaded"] += len(body)
+            self.index[key] = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "encoding": response.encoding,
+                "headers": {
+                    name: response.headers[name]
+                    for name in STORED_HEADERS
+                    if name in response.headers
+                },
+                "size": len(body),
+                "stored_at": now,
+                "accessed_at": now,
+            }
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until under max_bytes (lock held)"""
+        total = sum(entry["size"] for entry in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["accessed_at"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            del self.index[key]
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+
+    def save(self):
+        """Write the index to disk atomically"""
+        with self._lock:
+            data = json.dumps(self.index)
+        tmp_path = f"{self._index_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self._index_path())
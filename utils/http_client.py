@@ -1,25 +1,110 @@
+import time
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential
 from config import Config
 
 
+def _count_retry(retry_state):
+    """tenacity before_sleep hook: count the retry and its backoff on the client's metrics"""
+    client = retry_state.args[0]
+    if client.metrics:
+        client.metrics.inc("http_retries_total")
+        client.metrics.inc("http_retry_sleep_seconds_total", retry_state.next_action.sleep)
+
+
 class HTTPClient:
-    """HTTP client with automatic retry logic"""
+    """HTTP client with automatic retry logic
+
+    When a rate limiter is given, every attempt (including retries) waits
+    for the limiter and reports the outcome back so it can adapt. When an
+    HTTPCache is given, fresh entries skip the network entirely and stale
+    ones are fetched with a conditional GET. When a RunMetrics is given,
+    each attempt's latency, status and body size, retries, cache hits and
+    time spent waiting on the rate limiter are recorded on it.
+    """
 
-    def __init__(self):
+    def __init__(self, pool_size: int = Config.MAX_WORKERS, rate_limiter=None, cache=None, metrics=None):
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": Config.USER_AGENT})
 
+        # One pooled connection per worker thread sharing this client
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     @retry(
         stop=stop_after_attempt(Config.MAX_RETRIES),
         wait=wait_exponential(multiplier=1, min=4, max=10),
+        before_sleep=_count_retry,
     )
     def get(self, url):
         """Fetch URL with automatic retry on failure"""
-        response = self.session.get(url, timeout=Config.TIMEOUT)
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            cached = self.cache.serve(url, entry)
+            if cached is not None:
+                if self.metrics:
+                    self.metrics.inc("http_cache_responses_total", revalidated=False)
+                return cached
+
+        if self.rate_limiter:
+            slept = self.rate_limiter.wait(url)
+            if self.metrics:
+                self.metrics.inc("rate_limit_sleep_seconds_total", slept, host=urlsplit(url).netloc)
+
+        start = time.monotonic()
+        try:
+            response = self.session.get(
+                url,
+                timeout=Config.TIMEOUT,
+                headers=self.cache.conditional_headers(entry) if self.cache else None,
+            )
+        except requests.RequestException:
+            self._record(url, None, start)
+            raise
+
+        self._record(url, response, start)
+
+        if response.status_code == 304 and entry:
+            cached = self.cache.serve(url, entry, not_modified=response)
+            if cached is not None:
+                if self.metrics:
+                    self.metrics.inc("http_cache_responses_total", revalidated=True)
+                return cached
+            # Body vanished from disk; the retry fetches it unconditionally
+            raise requests.HTTPError(f"304 for {url} but cached body is missing")
+
         response.raise_for_status()
+        if self.cache:
+            self.cache.store(url, response)
         return response
 
+    def _record(self, url, response, start: float):
+        """Report the outcome of one attempt to the rate limiter and metrics"""
+        latency = time.monotonic() - start
+        if self.metrics:
+            host = urlsplit(url).netloc
+            status = response.status_code if response is not None else "error"
+            self.metrics.inc("http_requests_total", host=host, status=status)
+            self.metrics.observe("http_request_duration_seconds", latency, host=host)
+            if response is not None:
+                self.metrics.inc("http_response_bytes_total", len(response.content), host=host)
+        if not self.rate_limiter:
+            return
+        self.rate_limiter.record(
+            url,
+            status_code=response.status_code if response is not None else None,
+            latency=latency,
+            retry_after=response.headers.get("Retry-After") if response is not None else None,
+        )
+
     def close(self):
-        """Close the session"""
+        """Close the session and persist the cache index"""
         self.session.close()
+        if self.cache:
+            self.cache.save()
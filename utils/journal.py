@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, Optional
+from models.school import School
+from config import Config
+
+
+class ScrapeJournal:
+    """Append-only JSON Lines checkpoint of scraped schools
+
+    Each line records one detail page outcome keyed by detail URL. Lines
+    are flushed and fsync'd as they are written, so a crash loses at most
+    the line being written; a torn final line is ignored on load.
+    """
+
+    def __init__(self, path: str = Config.JOURNAL_FILE):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, dict]:
+        """Return the latest journal entry per detail URL"""
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn write from an interrupted run
+                entries[entry["detail_url"]] = entry
+        return entries
+
+    def completed_schools(self) -> Dict[str, School]:
+        """Schools whose detail page was scraped successfully, by detail URL"""
+        return {
+            url: School.from_dict(entry["school"])
+            for url, entry in self.load().items()
+            if entry.get("status") == "ok"
+        }
+
+    def open(self, resume: bool = False):
+        """Open for appending; a fresh run starts a new journal"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def record(self, school: School, status: str = "ok", error: Optional[str] = None):
+        """Durably append one school's outcome (safe to call from worker threads)"""
+        entry = {
+            "detail_url": school.detail_url,
+            "status": status,
+            "recorded_at": datetime.now().isoformat(),
+            "school": asdict(school),
+        }
+        if error:
+            entry["error"] = error
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
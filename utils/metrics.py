@@ -0,0 +1,182 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+# Histogram upper bounds (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Metric name -> (Prometheus type, help text); names get the "scraper_" prefix on export
+METRICS = {
+    "stage_duration_seconds": ("gauge", "Wall time of each pipeline stage"),
+    "http_requests_total": ("counter", "HTTP attempts sent to the network, by host and status"),
+    "http_request_duration_seconds": ("histogram", "Latency of HTTP attempts, by host"),
+    "http_response_bytes_total": ("counter", "Response body bytes received from the network, by host"),
+    "http_retries_total": ("counter", "Requests retried by HTTPClient.get"),
+    "http_retry_sleep_seconds_total": ("counter", "Backoff time slept between retries"),
+    "http_cache_responses_total": (
+        "counter",
+        "Responses served from the HTTP cache body: fresh hits with no request (revalidated=\"False\") "
+        "and 304 revalidations, which still make a request (revalidated=\"True\")",
+    ),
+    "rate_limit_sleep_seconds_total": ("counter", "Time slept waiting for the rate limiter, by host"),
+    "parse_duration_seconds": ("histogram", "Time to parse one page, by page type and parser"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus exposes it"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+class RunMetrics:
+    """
+    Metrics for one run, shared by worker threads: labelled counters,
+    histograms and stage timings. Written at the end of a run as JSON and
+    in the Prometheus text format (e.g. for node_exporter's textfile
+    collector).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self.status = "running"
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.extra: Dict[str, object] = {}  # Other components' stats, JSON only
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _labels(labels)
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage (recorded even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(),
+                "finished_at": datetime.now().isoformat(),
+                "status": self.status,
+                "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+                "counters": {
+                    name: [{"labels": dict(key), "value": round(value, 6)} for key, value in series.items()]
+                    for name, series in self.counters.items()
+                },
+                "histograms": {
+                    name: [{"labels": dict(key), **histogram.to_dict()} for key, histogram in series.items()]
+                    for name, series in self.histograms.items()
+                },
+                **self.extra,
+            }
+
+    def to_prometheus(self, prefix: str = "scraper_") -> str:
+        """Prometheus text exposition format"""
+        def series_name(name, key: Labels, extra: Labels = ()):
+            pairs = key + extra
+            if not pairs:
+                return name
+            return name + "{" + ",".join(f'{label}="{_escape(value)}"' for label, value in pairs) + "}"
+
+        lines = []
+
+        def header(name):
+            kind, help_text = METRICS.get(name, ("untyped", name))
+            lines.append(f"# HELP {prefix}{name} {help_text}")
+            lines.append(f"# TYPE {prefix}{name} {kind}")
+
+        with self._lock:
+            if self.stages:
+                header("stage_duration_seconds")
+                for stage, seconds in self.stages.items():
+                    lines.append(f"{series_name(prefix + 'stage_duration_seconds', (('stage', stage),))} {seconds:.6f}")
+            for name, series in self.counters.items():
+                header(name)
+                for key, value in series.items():
+                    lines.append(f"{series_name(prefix + name, key)} {_number(value)}")
+            for name, series in self.histograms.items():
+                header(name)
+                for key, histogram in series.items():
+                    for bound, count in histogram.to_dict()["buckets"].items():
+                        lines.append(f"{series_name(prefix + name + '_bucket', key, (('le', bound),))} {count}")
+                    lines.append(f"{series_name(prefix + name + '_sum', key)} {_number(histogram.sum)}")
+                    lines.append(f"{series_name(prefix + name + '_count', key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Optional[str], prometheus_path: Optional[str] = None):
+        """Write the JSON and/or Prometheus files atomically"""
+        if json_path:
+            _write_atomically(json_path, json.dumps(self.to_dict(), indent=2, ensure_ascii=False))
+        if prometheus_path:
+            _write_atomically(prometheus_path, self.to_prometheus())
+
+
+def _number(value: float) -> str:
+    """Sample value without losing precision: integers as integers, floats at full precision"""
+    if isinstance(value, int) or (math.isfinite(value) and value.is_integer()):
+        return str(int(value))
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_atomically(path: str, text: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
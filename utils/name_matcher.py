@@ -0,0 +1,158 @@
+import json
+import os
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set
+from config import Config
+
+# Below this, a fuzzy match is reported as uncertain
+CONFIDENT_SCORE = 0.9
+# A runner-up this close to the best match also makes it uncertain
+AMBIGUOUS_MARGIN = 0.05
+
+
+def normalize_name(name: str) -> str:
+    """Normalize school name for comparison."""
+    name = name.lower()
+    # Remove common suffixes and variations
+    replacements = [
+        ("secondary school", ""),
+        ("(secondary)", ""),
+        (" secondary", ""),
+        ("school", ""),
+        ("'s", "s"),
+        ("'", "'"),
+        ("  ", " "),
+    ]
+    for old, new in replacements:
+        name = name.replace(old, new)
+    return name.strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    name: str
+    match: Optional[str]
+    score: float  # SequenceMatcher ratio of the normalized names (1.0 for exact)
+    method: str  # "exact", "fuzzy", "cached" or "unmatched"
+    runner_up: float = 0.0  # Score of the next best candidate
+
+    @property
+    def uncertain(self) -> bool:
+        """A fuzzy match worth a human look: low score or a close second"""
+        if self.method != "fuzzy":
+            return False
+        return self.score < CONFIDENT_SCORE or self.score - self.runner_up < AMBIGUOUS_MARGIN
+
+
+class NameMatcher:
+    """
+    Matches names from another source to a fixed set of target names.
+
+    Targets are normalized once and indexed by character trigram. A name is
+    only scored against targets sharing a trigram with it, best candidates
+    first, and SequenceMatcher's cheap upper bounds skip any candidate that
+    cannot beat the best score so far. Scoring follows the original
+    fix_hmt_names rules: an exact normalized match wins outright, a target
+    containing the name (or contained in it) may match at any score, and
+    anything else needs a score above ``threshold``.
+
+    Confident matches (and any mapping marked "confirmed" in the cache
+    file) are stored in ``cache_path`` and reused on later runs while the
+    target still exists; uncertain ones are re-scored each run until
+    confirmed.
+    """
+
+    def __init__(
+        self,
+        targets: Iterable[str],
+        cache_path: Optional[str] = Config.NAME_MATCH_CACHE,
+        threshold: float = 0.6,
+    ):
+        self.targets = sorted(set(targets))
+        self.threshold = threshold
+        self.cache_path = cache_path
+        self._target_set = set(self.targets)
+        self._normalized = [normalize_name(target) for target in self.targets]
+        # One matcher per target: SequenceMatcher indexes its second sequence once
+        self._matchers = [SequenceMatcher(None, "", normalized) for normalized in self._normalized]
+        self._exact: Dict[str, int] = {}
+        self._index: Dict[str, List[int]] = {}
+        for i, normalized in enumerate(self._normalized):
+            self._exact.setdefault(normalized, i)
+            for gram in trigrams(normalized):
+                self._index.setdefault(gram, []).append(i)
+
+        self.cache: Dict[str, dict] = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+
+    def match(self, name: str) -> MatchResult:
+        cached = self.cache.get(name)
+        if cached and cached["match"] in self._target_set:
+            return MatchResult(name, cached["match"], cached["score"], "cached")
+
+        result = self._score(name)
+        if result.match and (result.method == "exact" or not result.uncertain):
+            self.cache[name] = {"match": result.match, "score": round(result.score, 4), "confirmed": False}
+        return result
+
+    def match_all(self, names: Iterable[str]) -> Dict[str, MatchResult]:
+        return {name: self.match(name) for name in names}
+
+    def confirm(self, result: MatchResult):
+        """Store a match (e.g. an uncertain one a human accepted) so it is reused"""
+        if result.match:
+            self.cache[result.name] = {"match": result.match, "score": round(result.score, 4), "confirmed": True}
+
+    def _score(self, name: str) -> MatchResult:
+        normalized = normalize_name(name)
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            return MatchResult(name, self.targets[exact], 1.0, "exact")
+
+        # Candidates sharing the most trigrams first, so the best score rises quickly
+        shared: Dict[int, int] = {}
+        for gram in trigrams(normalized):
+            for i in self._index.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        candidates = sorted(shared, key=lambda i: (-shared[i], i))
+
+        best, best_score, runner_up = None, 0.0, 0.0
+        for i in candidates:
+            target = self._normalized[i]
+            contained = normalized in target or target in normalized
+            matcher = self._matchers[i]
+            matcher.set_seq1(normalized)
+            # Upper bounds first: skip candidates that cannot beat the runner-up
+            if matcher.real_quick_ratio() <= runner_up or matcher.quick_ratio() <= runner_up:
+                continue
+            score = matcher.ratio()
+            if not contained and score <= self.threshold:
+                continue
+            if score > best_score:
+                best, best_score, runner_up = i, score, best_score
+            elif score > runner_up:
+                runner_up = score
+
+        if best is None:
+            return MatchResult(name, None, 0.0, "unmatched")
+        return MatchResult(name, self.targets[best], best_score, "fuzzy", runner_up)
+
+    def save(self):
+        """Write the mapping cache to disk atomically"""
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+import zstandard
+from config import Config
+
+COMPRESSION_LEVEL = 9
+DICTIONARY_SIZE = 112 * 1024
+MIN_TRAINING_SAMPLES = 20  # Pages needed before a dictionary is worth training
+
+
+class PageArchive:
+    """
+    Content-addressed archive of fetched pages.
+
+    Each distinct body is stored once, zstd-compressed, under
+    objects/<sha256[:2]>/<sha256>.zst. Every fetch is appended to
+    index.jsonl with its URL, digest, fetch time, run id and response
+    encoding, so the pages a run parsed can be read back (and decoded the
+    same way) later without the network.
+
+    Pages share one site template, so once MIN_TRAINING_SAMPLES pages are
+    stored a zstd dictionary is trained on them (see train_dictionary) and
+    used for later pages. Frames record their dictionary ID, so pages
+    written with older dictionaries (or none) stay readable.
+    """
+
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, root: str = Config.ARCHIVE_DIR, run: Optional[str] = None):
+        self.root = root
+        # Microseconds and a random suffix keep runs started in the same second (e.g. queue workers) apart
+        self.run = run or f"{datetime.now():%Y%m%dT%H%M%S.%f}-{secrets.token_hex(2)}"
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._index_file = None
+        self._dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+        self.dictionary = self._load_dictionaries()
+        self.stats = {"pages": 0, "new_objects": 0, "bytes_in": 0, "bytes_stored": 0}
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.zst")
+
+    def _dictionary_dir(self) -> str:
+        return os.path.join(self.root, "dictionaries")
+
+    def _load_dictionaries(self) -> Optional[zstandard.ZstdCompressionDict]:
+        """Load every stored dictionary; returns the newest (used for writing)"""
+        newest = None
+        directory = self._dictionary_dir()
+        if not os.path.isdir(directory):
+            return None
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".dict"):
+                continue
+            with open(os.path.join(directory, name), "rb") as f:
+                dictionary = zstandard.ZstdCompressionDict(f.read())
+            self._dictionaries[dictionary.dict_id()] = dictionary
+            newest = dictionary  # Files are named by creation time
+        return newest
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        """Per-thread compressor for the current dictionary (compressors aren't thread-safe)"""
+        dict_id = self.dictionary.dict_id() if self.dictionary else 0
+        if getattr(self._local, "dict_id", None) != dict_id:
+            self._local.compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=self.dictionary)
+            self._local.dict_id = dict_id
+        return self._local.compressor
+
+    def store(
+        self, url: str, body: bytes, fetched_at: Optional[datetime] = None, encoding: Optional[str] = None
+    ) -> str:
+        """Archive one fetched page with the encoding it was decoded with; returns its digest"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        created = False
+        if not os.path.exists(path):
+            data = self._compressor().compress(body)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # Unique across queue workers too
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            created = True
+
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "fetched_at": (fetched_at or datetime.now()).isoformat(),
+            "run": self.run,
+            "bytes": len(body),
+        }
+        if encoding:
+            entry["encoding"] = encoding
+        with self._lock:
+            if self._index_file is None:
+                os.makedirs(self.root, exist_ok=True)
+                self._index_file = open(os.path.join(self.root, self.INDEX_FILE), "a", encoding="utf-8")
+            self._index_file.write(json.dumps(entry) + "\n")
+            self._index_file.flush()
+            self.stats["pages"] += 1
+            self.stats["bytes_in"] += len(body)
+            if created:
+                self.stats["new_objects"] += 1
+                self.stats["bytes_stored"] += os.path.getsize(path)
+        return digest
+
+    def load(self, digest: str) -> bytes:
+        """Decompressed body of an archived page"""
+        with open(self._object_path(digest), "rb") as f:
+            data = f.read()
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        dictionary = self._dictionaries.get(dict_id) if dict_id else None
+        if dict_id and dictionary is None:
+            raise ValueError(f"Archived page {digest} needs zstd dictionary {dict_id}, which is missing")
+        return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data)
+
+    def entries(self) -> List[dict]:
+        """Every archived fetch, oldest first"""
+        path = os.path.join(self.root, self.INDEX_FILE)
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn last line from an interrupted run
+        return entries
+
+    def runs(self) -> List[str]:
+        """Run ids in the archive, oldest first"""
+        return list(dict.fromkeys(entry["run"] for entry in self.entries()))
+
+    def snapshot(self, run: Optional[str] = None) -> Dict[str, dict]:
+        """
+        The page state as of the end of a run (default: the latest): for each
+        URL, its last fetch in or before that run. Pages a resumed run did
+        not refetch therefore come from the earlier run that fetched them.
+        A unique prefix of a run id (e.g. its timestamp) selects that run.
+        """
+        entries = self.entries()
+        runs = list(dict.fromkeys(entry["run"] for entry in entries))
+        if not runs:
+            return {}
+        run = run or runs[-1]
+        if run not in runs:
+            matches = [candidate for candidate in runs if candidate.startswith(run)]
+            if len(matches) != 1:
+                raise ValueError(f"No single run '{run}' in {self.root} (runs: {', '.join(runs)})")
+            run = matches[0]
+        included = set(runs[: runs.index(run) + 1])
+
+        pages = {}
+        for entry in entries:
+            if entry["run"] in included:
+                pages[entry["url"]] = entry
+        return pages
+
+    @staticmethod
+    def path_key(url: str) -> str:
+        """URL without scheme and host, for matching pages across BASE_URL changes"""
+        parts = urlsplit(url)
+        return parts.path + (f"?{parts.query}" if parts.query else "")
+
+    def train_dictionary(self, max_samples: int = 500) -> bool:
+        """
+        Train a dictionary on archived pages and recompress existing objects
+        with it. Returns False if there are too few pages to train on.
+        """
+        digests = list(dict.fromkeys(entry["sha256"] for entry in reversed(self.entries())))[:max_samples]
+        if len(digests) < MIN_TRAINING_SAMPLES:
+            return False
+        samples = [self.load(digest) for digest in digests]
+        try:
+            dictionary = zstandard.train_dictionary(DICTIONARY_SIZE, samples)
+        except zstandard.ZstdError:
+            return False
+
+        os.makedirs(self._dictionary_dir(), exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{dictionary.dict_id()}.dict"
+        with open(os.path.join(self._dictionary_dir(), name), "wb") as f:
+            f.write(dictionary.as_bytes())
+        self._dictionaries[dictionary.dict_id()] = dictionary
+        self.dictionary = dictionary
+
+        # Rewrite every object with the new dictionary
+        for root, _, files in os.walk(os.path.join(self.root, "objects")):
+            for file_name in files:
+                if not file_name.endswith(".zst"):
+                    continue
+                digest = file_name[: -len(".zst")]
+                body = self.load(digest)
+                path = self._object_path(digest)
+                with open(f"{path}.tmp", "wb") as f:
+                    f.write(self._compressor().compress(body))
+                os.replace(f"{path}.tmp", path)
+        return True
+
+    def close(self, train: bool = True):
+        """
+        Close the index; trains the first dictionary once enough pages are
+        archived. Processes writing one archive at once pass train=False and
+        leave training to a single process afterwards.
+        """
+        with self._lock:
+            if self._index_file:
+                self._index_file.close()
+                self._index_file = None
+        if train and self.dictionary is None and self.stats["new_objects"]:
+            self.train_dictionary()
@@ -1,21 +1,200 @@
+import asyncio
+import threading
 import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
 from config import Config
 
+# Responses that mean "slow down" regardless of latency
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header (seconds or HTTP date) to seconds from now"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Token bucket for a single host with AIMD rate adjustment
+
+    Tokens may go negative: each caller reserves one token and is told how
+    long to wait until its reservation is covered, so callers queue in
+    arrival order without holding the lock while sleeping.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float, max_rate: float):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+
+        # Tuning statistics
+        self.requests = 0
+        self.throttled = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return how long the caller must wait for it"""
+        self._refill(now)
+        self.tokens -= 1
+        delay = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        delay = max(delay, self.blocked_until - now)
+
+        self.requests += 1
+        self.total_queue_delay += delay
+        self.max_queue_delay = max(self.max_queue_delay, delay)
+        return delay
+
+    def increase(self, step: float):
+        """Additive increase after a healthy response"""
+        self.rate = min(self.max_rate, self.rate + step)
+
+    def decrease(self, now: float, factor: float, cooldown: float):
+        """Multiplicative decrease, at most once per cooldown window"""
+        if now - self.last_decrease < cooldown:
+            return
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * factor)
+        self.tokens = min(self.tokens, 0.0)  # Drop any saved-up burst
+        self.last_decrease = now
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "rate": round(self.rate, 3),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "avg_queue_delay": round(self.total_queue_delay / self.requests, 3)
+            if self.requests
+            else 0.0,
+            "max_queue_delay": round(self.max_queue_delay, 3),
+        }
+
 
 class RateLimiter:
-    """Rate limiter to add delays between requests"""
+    """Adaptive per-host rate limiter shared by worker threads and asyncio tasks
+
+    Each host gets its own token bucket that starts at one request per
+    ``delay`` seconds. The rate grows additively while responses are fast
+    and healthy, and is cut multiplicatively on slow responses, errors and
+    429/503 responses; ``Retry-After`` pauses the host entirely.
 
-    def __init__(self, delay=Config.REQUEST_DELAY):
+    Buckets live in memory; subclasses can keep them elsewhere by
+    overriding _locked_bucket (see utils.work_queue.SharedRateLimiter).
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(
+        self,
+        delay=Config.REQUEST_DELAY,
+        burst=Config.RATE_LIMIT_BURST,
+        min_rate=Config.RATE_LIMIT_MIN,
+        max_rate=Config.RATE_LIMIT_MAX,
+        latency_target=Config.LATENCY_TARGET,
+        increase_step=0.05,
+        decrease_factor=0.5,
+    ):
         self.delay = delay
-        self.last_request_time = 0
+        self.initial_rate = 1.0 / delay if delay > 0 else max_rate
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, self.initial_rate)
+        self.max_rate = max(max_rate, self.initial_rate)
+        self.latency_target = latency_target
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url: Optional[str]) -> str:
+        return urlsplit(url).netloc if url else ""
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(
+                self.initial_rate, self.burst, self.min_rate, self.max_rate
+            )
+            self.buckets[host] = bucket
+        return bucket
+
+    @contextmanager
+    def _locked_bucket(self, url: Optional[str]) -> Iterator[TokenBucket]:
+        """The URL's host bucket, held exclusively for the duration of the block"""
+        with self._lock:
+            yield self._bucket(self._host(url))
+
+    def _reserve(self, url: Optional[str]) -> float:
+        with self._locked_bucket(url) as bucket:
+            return bucket.reserve(self.clock())
+
+    def wait(self, url: Optional[str] = None) -> float:
+        """Wait appropriate time before next request; returns seconds slept"""
+        delay = self._reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, url: Optional[str] = None) -> float:
+        """Asyncio variant of wait() that does not block the event loop"""
+        delay = self._reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def record(
+        self,
+        url: Optional[str] = None,
+        status_code: Optional[int] = None,
+        latency: Optional[float] = None,
+        retry_after: Optional[str] = None,
+    ):
+        """Feed a response (or a failed request when status_code is None) back into the host's rate"""
+        now = self.clock()
+        cooldown = max(latency or 0.0, self.latency_target)
 
-    def wait(self):
-        """Wait appropriate time before next request"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+        with self._locked_bucket(url) as bucket:
+            if status_code in THROTTLE_STATUS_CODES:
+                bucket.throttled += 1
+                pause = parse_retry_after(retry_after)
+                if pause:
+                    bucket.blocked_until = max(bucket.blocked_until, now + pause)
+                bucket.decrease(now, self.decrease_factor, cooldown)
+            elif status_code is None or status_code >= 500:
+                bucket.decrease(now, self.decrease_factor, cooldown)
+            elif latency is not None and latency > self.latency_target:
+                bucket.decrease(now, self.decrease_factor, cooldown)
+            else:
+                bucket.increase(self.increase_step)
 
-        if time_since_last < self.delay:
-            sleep_time = self.delay - time_since_last
-            time.sleep(sleep_time)
+    def current_rate(self, url: Optional[str] = None) -> float:
+        """Current requests per second allowed for the URL's host"""
+        with self._locked_bucket(url) as bucket:
+            return bucket.rate
 
-        self.last_request_time = time.time()
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-host rate and queueing delay statistics"""
+        with self._lock:
+            return {host: bucket.stats() for host, bucket in self.buckets.items()}
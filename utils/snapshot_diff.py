@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+Row = Dict[str, str]
+
+KEY_FIELD = "Detail URL"
+# Fields that change on every run without the school changing
+IGNORED_FIELDS = ("Scrape Timestamp",)
+
+
+def load_snapshot(path: str, key: str = KEY_FIELD) -> Tuple[List[str], Dict[str, Row]]:
+    """Header and rows of a schools CSV keyed by detail URL; empty if the file doesn't exist"""
+    if not os.path.exists(path):
+        return [], {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = {row[key]: row for row in reader if row.get(key)}
+        return list(reader.fieldnames or []), rows
+
+
+@dataclass
+class SnapshotDiff:
+    """Schools added, removed and changed between two snapshots, keyed by detail URL"""
+
+    added: Dict[str, Row] = field(default_factory=dict)
+    removed: Dict[str, Row] = field(default_factory=dict)
+    # Key -> field -> (old, new)
+    changed: Dict[str, Dict[str, Tuple[str, str]]] = field(default_factory=dict)
+    unchanged: int = 0
+    added_columns: List[str] = field(default_factory=list)
+    removed_columns: List[str] = field(default_factory=list)
+
+    def field_counts(self) -> Counter:
+        """How many schools changed in each field"""
+        return Counter(name for fields in self.changed.values() for name in fields)
+
+    def summary(self) -> List[str]:
+        """Human-readable change summary"""
+        lines = [
+            f"{len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.changed)} changed, {self.unchanged} unchanged"
+        ]
+        if self.added_columns:
+            lines.append(f"  New columns: {', '.join(self.added_columns)}")
+        if self.removed_columns:
+            lines.append(f"  Dropped columns: {', '.join(self.removed_columns)}")
+        for name, count in self.field_counts().most_common():
+            lines.append(f"  {name}: {count} changed")
+        return lines
+
+    def to_dict(self, name_field: str = "School Name") -> dict:
+        """
+        Delta document: added rows in full, removed rows by name, and only
+        the changed fields (old and new values) of changed rows
+        """
+        return {
+            "created_at": datetime.now().isoformat(),
+            "key": KEY_FIELD,
+            "summary": {
+                "added": len(self.added),
+                "removed": len(self.removed),
+                "changed": len(self.changed),
+                "unchanged": self.unchanged,
+                "fields": dict(self.field_counts().most_common()),
+                "added_columns": self.added_columns,
+                "removed_columns": self.removed_columns,
+            },
+            "added": list(self.added.values()),
+            "removed": [{KEY_FIELD: key, name_field: row.get(name_field, "")} for key, row in self.removed.items()],
+            "changed": [
+                {
+                    KEY_FIELD: key,
+                    "fields": {name: {"old": old, "new": new} for name, (old, new) in fields.items()},
+                }
+                for key, fields in self.changed.items()
+            ],
+        }
+
+    def write(self, path: str):
+        """Write the delta document atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def diff_snapshots(
+    old_rows: Dict[str, Row],
+    new_rows: Iterable[Row],
+    old_fieldnames: Optional[List[str]] = None,
+    new_fieldnames: Optional[List[str]] = None,
+    key: str = KEY_FIELD,
+    ignore: Iterable[str] = IGNORED_FIELDS,
+) -> SnapshotDiff:
+    """
+    Compare a new snapshot with the previous one (rows keyed by ``key``).
+    Fields in ``ignore`` are not compared; a column present on only one
+    side compares as empty.
+    """
+    ignore = set(ignore) | {key}
+    diff = SnapshotDiff()
+    if old_fieldnames and new_fieldnames:  # No column diff against a missing snapshot
+        diff.added_columns = [name for name in new_fieldnames if name not in old_fieldnames]
+        diff.removed_columns = [name for name in old_fieldnames if name not in new_fieldnames]
+
+    seen = set()
+    for row in new_rows:
+        row_key = row.get(key)
+        if not row_key:
+            continue
+        seen.add(row_key)
+        old = old_rows.get(row_key)
+        if old is None:
+            diff.added[row_key] = row
+            continue
+        fields = {}
+        for name in dict.fromkeys([*old, *row]):
+            if name in ignore:
+                continue
+            old_value, new_value = old.get(name) or "", row.get(name) or ""
+            if old_value != new_value:
+                fields[name] = (old_value, new_value)
+        if fields:
+            diff.changed[row_key] = fields
+        else:
+            diff.unchanged += 1
+
+    diff.removed = {row_key: row for row_key, row in old_rows.items() if row_key not in seen}
+    return diff
+
+
+def load_delta(path: str) -> dict:
+    """Read a delta document written by SnapshotDiff.write"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def delta_affected(delta: dict) -> Set[str]:
+    """Keys of the rows a delta document added or changed"""
+    key = delta.get("key", KEY_FIELD)
+    return {row[key] for row in delta["added"]} | {entry[key] for entry in delta["changed"]}
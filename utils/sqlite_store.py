@@ -0,0 +1,299 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Collection, Dict, Iterable, List, Optional
+from config import Config
+from models.school import School
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,                 -- 'scrape', 'reparse' or 'enrich'
+    source TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL DEFAULT 'running',
+    schools INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS schools (
+    detail_url TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    gender TEXT,
+    town TEXT,
+    address TEXT,
+    scraped_at TEXT,
+    first_run_id INTEGER REFERENCES runs(id),
+    last_run_id INTEGER REFERENCES runs(id)
+);
+CREATE INDEX IF NOT EXISTS schools_name ON schools(name);
+CREATE INDEX IF NOT EXISTS schools_town ON schools(town);
+
+-- Current cut-offs in long format, one row per year, posting group and affiliation
+CREATE TABLE IF NOT EXISTS cutoffs (
+    detail_url TEXT NOT NULL REFERENCES schools(detail_url),
+    year INTEGER NOT NULL,
+    posting_group TEXT NOT NULL,
+    affiliated INTEGER NOT NULL,
+    score INTEGER,                      -- NULL when the scraped text isn't a number
+    score_text TEXT,                    -- Score as scraped
+    grade TEXT,
+    run_id INTEGER REFERENCES runs(id),  -- Run that last changed the value
+    PRIMARY KEY (detail_url, year, posting_group, affiliated)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cutoffs_year_group ON cutoffs(year, posting_group, affiliated, score);
+
+-- Every value a cut-off has had, filled in by the triggers below (NULL score_text: removed)
+CREATE TABLE IF NOT EXISTS cutoff_history (
+    run_id INTEGER REFERENCES runs(id),
+    detail_url TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    posting_group TEXT NOT NULL,
+    affiliated INTEGER NOT NULL,
+    score INTEGER,
+    score_text TEXT,
+    grade TEXT
+);
+CREATE INDEX IF NOT EXISTS cutoff_history_key ON cutoff_history(detail_url, year, posting_group, affiliated);
+CREATE INDEX IF NOT EXISTS cutoff_history_run ON cutoff_history(run_id);
+
+CREATE TRIGGER IF NOT EXISTS cutoffs_inserted AFTER INSERT ON cutoffs BEGIN
+    INSERT INTO cutoff_history (run_id, detail_url, year, posting_group, affiliated, score, score_text, grade)
+    VALUES (NEW.run_id, NEW.detail_url, NEW.year, NEW.posting_group, NEW.affiliated, NEW.score, NEW.score_text, NEW.grade);
+END;
+CREATE TRIGGER IF NOT EXISTS cutoffs_updated AFTER UPDATE ON cutoffs
+WHEN OLD.score_text IS NOT NEW.score_text OR OLD.grade IS NOT NEW.grade BEGIN
+    INSERT INTO cutoff_history (run_id, detail_url, year, posting_group, affiliated, score, score_text, grade)
+    VALUES (NEW.run_id, NEW.detail_url, NEW.year, NEW.posting_group, NEW.affiliated, NEW.score, NEW.score_text, NEW.grade);
+END;
+
+CREATE TABLE IF NOT EXISTS coordinates (
+    school_name TEXT PRIMARY KEY,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    address TEXT,                       -- Address the coordinates were resolved from
+    run_id INTEGER REFERENCES runs(id)
+);
+
+CREATE TABLE IF NOT EXISTS hmt_offerings (
+    school_name TEXT NOT NULL,
+    language TEXT NOT NULL,             -- 'HCL', 'HTL' or 'HML'
+    first_run_id INTEGER REFERENCES runs(id),
+    last_run_id INTEGER REFERENCES runs(id),
+    PRIMARY KEY (school_name, language)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hmt_offerings_language ON hmt_offerings(language);
+"""
+
+_UPSERT_SCHOOL = """
+INSERT INTO schools (detail_url, name, gender, town, address, scraped_at, first_run_id, last_run_id)
+VALUES (:detail_url, :name, :gender, :town, :address, :scraped_at, :run_id, :run_id)
+ON CONFLICT (detail_url) DO UPDATE SET
+    name = excluded.name, gender = excluded.gender,
+    town = COALESCE(excluded.town, schools.town), address = COALESCE(excluded.address, schools.address),
+    scraped_at = excluded.scraped_at, last_run_id = excluded.last_run_id
+"""
+
+# Unchanged cut-offs are left alone, so run_id stays the run that set the value
+_UPSERT_CUTOFF = """
+INSERT INTO cutoffs (detail_url, year, posting_group, affiliated, score, score_text, grade, run_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (detail_url, year, posting_group, affiliated) DO UPDATE SET
+    score = excluded.score, score_text = excluded.score_text, grade = excluded.grade, run_id = excluded.run_id
+WHERE cutoffs.score_text IS NOT excluded.score_text OR cutoffs.grade IS NOT excluded.grade
+"""
+
+
+def _score(value: Optional[str]) -> Optional[int]:
+    """Numeric score for the score column; the text itself is always kept in score_text"""
+    return int(value) if value and value.isascii() and value.isdigit() else None
+
+
+class SchoolStore:
+    """
+    SQLite copy of the scraped and enriched data, for history and ad-hoc queries.
+
+    The database runs in WAL mode, so readers (e.g. the sqlite3 shell)
+    never block a run that is writing. Every scrape, re-parse and enrichment
+    is recorded in ``runs``. Writes are upserts keyed by detail URL (schools,
+    cut-offs) or school name (coordinates, HMT offerings), and each cut-off
+    value change is appended to ``cutoff_history`` by a trigger.
+    """
+
+    def __init__(self, path: str = Config.SQLITE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; WAL keeps it consistent
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self._migrate()
+
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{self.path} has schema version {version}; this code supports {SCHEMA_VERSION}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def __enter__(self) -> "SchoolStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # Runs
+
+    def start_run(self, kind: str, source: Optional[str] = None, started_at: Optional[datetime] = None) -> int:
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (kind, source, started_at) VALUES (?, ?, ?)",
+                (kind, source, (started_at or datetime.now()).isoformat()),
+            )
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: int, status: str, schools: Optional[int] = None):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, schools = COALESCE(?, schools) WHERE id = ?",
+                (datetime.now().isoformat(), status, schools, run_id),
+            )
+
+    # Writes
+
+    def upsert_schools(self, schools: Iterable[School], run_id: int, detailed: Collection[str] = ()) -> int:
+        """
+        Upsert schools and their cut-offs in one transaction. Schools
+        missing from this batch are kept.
+
+        Only schools whose detail page was scraped (detail URLs in
+        ``detailed``) have their cut-offs replaced: stored cut-offs missing
+        from the page are deleted and recorded in the history as removed.
+        For the rest (e.g. a failed fetch that left only main page
+        cut-offs) the scraped values are upserted and nothing is deleted,
+        and a missing town or address keeps its stored value.
+        """
+        count = 0
+        with self.conn:
+            for school in schools:
+                self.conn.execute(_UPSERT_SCHOOL, {
+                    "detail_url": school.detail_url,
+                    "name": school.name,
+                    "gender": school.gender or school.derive_gender(),
+                    "town": school.town,
+                    "address": school.address,
+                    "scraped_at": school.scrape_timestamp,
+                    "run_id": run_id,
+                })
+                keys = set()
+                for record in school.cutoffs:
+                    keys.add(record.key)
+                    self.conn.execute(_UPSERT_CUTOFF, (
+                        school.detail_url, record.year, record.group, int(record.affiliated),
+                        _score(record.score), record.score, record.grade, run_id,
+                    ))
+                if school.detail_url in detailed:
+                    self._delete_missing_cutoffs(school.detail_url, keys, run_id)
+                count += 1
+        return count
+
+    def _delete_missing_cutoffs(self, detail_url: str, keys: set, run_id: int):
+        stale = [
+            (row["year"], row["posting_group"], row["affiliated"])
+            for row in self.conn.execute(
+                "SELECT year, posting_group, affiliated FROM cutoffs WHERE detail_url = ?", (detail_url,)
+            )
+            if (row["year"], row["posting_group"], bool(row["affiliated"])) not in keys
+        ]
+        for year, group, affiliated in stale:
+            self.conn.execute(
+                "DELETE FROM cutoffs WHERE detail_url = ? AND year = ? AND posting_group = ? AND affiliated = ?",
+                (detail_url, year, group, affiliated),
+            )
+            self.conn.execute(
+                "INSERT INTO cutoff_history (run_id, detail_url, year, posting_group, affiliated) VALUES (?, ?, ?, ?, ?)",
+                (run_id, detail_url, year, group, affiliated),
+            )
+
+    def upsert_coordinates(self, coordinates: Dict[str, dict], run_id: int) -> int:
+        """Upsert {school name: {"latitude", "longitude", "address"?}} as in the coordinates file"""
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO coordinates (school_name, latitude, longitude, address, run_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (school_name) DO UPDATE SET
+                    latitude = excluded.latitude, longitude = excluded.longitude,
+                    address = excluded.address, run_id = excluded.run_id
+                WHERE coordinates.latitude IS NOT excluded.latitude
+                    OR coordinates.longitude IS NOT excluded.longitude
+                    OR coordinates.address IS NOT excluded.address
+                """,
+                [
+                    (name, entry["latitude"], entry["longitude"], entry.get("address"), run_id)
+                    for name, entry in coordinates.items()
+                ],
+            )
+        return len(coordinates)
+
+    def replace_hmt_offerings(self, offerings: Dict[str, Iterable[str]], run_id: int) -> int:
+        """
+        Make HMT offerings match {language column: school names}; schools
+        no longer listed for a language are removed from it
+        """
+        count = 0
+        with self.conn:
+            for language, names in offerings.items():
+                names = set(names)
+                self.conn.executemany(
+                    """
+                    INSERT INTO hmt_offerings (school_name, language, first_run_id, last_run_id)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (school_name, language) DO UPDATE SET last_run_id = excluded.last_run_id
+                    """,
+                    [(name, language, run_id, run_id) for name in names],
+                )
+                self.conn.execute(
+                    "DELETE FROM hmt_offerings WHERE language = ? AND last_run_id IS NOT ?", (language, run_id)
+                )
+                count += len(names)
+        return count
+
+    # Lookups
+
+    def cutoffs(self, year: int, group: str, affiliated: bool = False, max_score: Optional[int] = None) -> List[sqlite3.Row]:
+        """Schools' cut-offs for one year and posting group, lowest first"""
+        query = """
+            SELECT s.name, s.town, c.score, c.score_text, c.grade FROM cutoffs c JOIN schools s USING (detail_url)
+            WHERE c.year = ? AND c.posting_group = ? AND c.affiliated = ?
+        """
+        params = [year, group, int(affiliated)]
+        if max_score is not None:
+            query += " AND c.score <= ?"
+            params.append(max_score)
+        return self.conn.execute(query + " ORDER BY c.score, s.name", params).fetchall()
+
+    def schools_in_town(self, town: str) -> List[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM schools WHERE town = ? ORDER BY name", (town,)).fetchall()
+
+    def cutoff_history(self, detail_url: str) -> List[sqlite3.Row]:
+        """Every recorded value of a school's cut-offs, with the run that saw it"""
+        return self.conn.execute(
+            """
+            SELECT h.year, h.posting_group, h.affiliated, h.score, h.score_text, h.grade, r.id AS run_id, r.started_at
+            FROM cutoff_history h LEFT JOIN runs r ON r.id = h.run_id
+            WHERE h.detail_url = ?
+            ORDER BY h.year DESC, h.posting_group, h.affiliated, r.id
+            """,
+            (detail_url,),
+        ).fetchall()
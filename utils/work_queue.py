@@ -0,0 +1,312 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from config import Config
+from utils.rate_limiter import RateLimiter, TokenBucket
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    queue TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT,                       -- JSON passed to the worker
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, leased, done or dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,         -- Retry backoff: not leased before this time
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,                        -- JSON returned by the worker
+    error TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (queue, url)
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks(queue, status, available_at);
+CREATE INDEX IF NOT EXISTS tasks_leases ON tasks(status, lease_expires);
+
+-- Token bucket state per host, shared by every process using the file
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    host TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+"""
+
+_READY = "(status = 'pending' AND available_at <= :now) OR (status = 'leased' AND lease_expires < :now)"
+
+
+@dataclass
+class Task:
+    id: int
+    queue: str
+    url: str
+    payload: Optional[dict]
+    status: str
+    attempts: int
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Task":
+        keys = row.keys()
+        return cls(
+            id=row["id"],
+            queue=row["queue"],
+            url=row["url"],
+            payload=json.loads(row["payload"]) if row["payload"] else None,
+            status=row["status"],
+            attempts=row["attempts"],
+            result=json.loads(row["result"]) if "result" in keys and row["result"] else None,
+            error=row["error"] if "error" in keys else None,
+        )
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Durable queue of URLs in a SQLite file (WAL mode), shared by any number
+    of worker processes on one host. WAL keeps its index in shared memory,
+    so the file can't be shared with other machines (not even over a
+    network filesystem).
+
+    A worker leases a task for ``lease_seconds`` and extends the lease with
+    heartbeat() while it works. If it dies, the lease expires and another
+    worker picks the task up. Failed tasks are retried with exponential
+    backoff; a task that has used up max_attempts (including expired
+    leases) is dead-lettered with its last error.
+    """
+
+    def __init__(self, path: str = Config.QUEUE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()  # One connection per thread (heartbeats run on their own)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front so leases can't race"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def enqueue(
+        self,
+        queue: str,
+        items: Iterable[Tuple[str, Optional[dict]]],
+        max_attempts: int = Config.QUEUE_MAX_ATTEMPTS,
+    ) -> int:
+        """Add (url, payload) tasks; URLs already in the queue are skipped. Returns the number added"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO tasks (queue, url, payload, max_attempts, available_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (queue, url, json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+                     max_attempts, now, now)
+                    for url, payload in items
+                ],
+            )
+            return conn.total_changes - before
+
+    def clear(self, queue: str) -> int:
+        """Delete every task of a queue"""
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM tasks WHERE queue = ?", (queue,)).rowcount
+
+    def lease(self, queue: str, worker_id: str, lease_seconds: float = Config.QUEUE_LEASE_SECONDS) -> Optional[Task]:
+        """Lease the oldest ready task (pending, or leased by a worker whose lease expired), if any"""
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases that were the task's last attempt go to the dead letters
+            conn.execute(
+                """
+                UPDATE tasks SET status = 'dead', lease_owner = NULL, updated_at = :now,
+                    error = COALESCE(error, 'lease expired') || ' (attempts exhausted)'
+                WHERE queue = :queue AND status = 'leased' AND lease_expires < :now AND attempts >= max_attempts
+                """,
+                {"queue": queue, "now": now},
+            )
+            row = conn.execute(
+                f"""
+                UPDATE tasks SET status = 'leased', lease_owner = :owner, lease_expires = :expires,
+                    attempts = attempts + 1, updated_at = :now
+                WHERE id = (SELECT id FROM tasks WHERE queue = :queue AND ({_READY}) ORDER BY id LIMIT 1)
+                RETURNING id, queue, url, payload, status, attempts
+                """,
+                {"queue": queue, "owner": worker_id, "expires": now + lease_seconds, "now": now},
+            ).fetchone()
+        return Task.from_row(row) if row else None
+
+    def heartbeat(self, task: Task, worker_id: str, lease_seconds: float = Config.QUEUE_LEASE_SECONDS) -> bool:
+        """Extend a lease; False if the worker no longer holds it"""
+        now = time.time()
+        with self._transaction() as conn:
+            return conn.execute(
+                """
+                UPDATE tasks SET lease_expires = ?, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+                """,
+                (now + lease_seconds, now, task.id, worker_id),
+            ).rowcount == 1
+
+    def complete(self, task: Task, worker_id: str, result: dict) -> bool:
+        """Store a task's result; False (and nothing stored) if the lease was lost to another worker"""
+        with self._transaction() as conn:
+            return conn.execute(
+                """
+                UPDATE tasks SET status = 'done', result = ?, error = NULL, lease_owner = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+                """,
+                (json.dumps(result, ensure_ascii=False), time.time(), task.id, worker_id),
+            ).rowcount == 1
+
+    def fail(self, task: Task, worker_id: str, error: str, backoff: float = Config.QUEUE_RETRY_BACKOFF) -> str:
+        """Record a failed attempt: retried after backoff * 2^(attempts-1) seconds, or dead-lettered. Returns the new status"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                """
+                UPDATE tasks SET
+                    status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END,
+                    available_at = ? + ? * (1 << (attempts - 1)),
+                    error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+                RETURNING status
+                """,
+                (now, backoff, error, now, task.id, worker_id),
+            ).fetchone()
+        return row["status"] if row else "lost"
+
+    def requeue_dead(self, queue: str) -> int:
+        """Give dead-lettered tasks a fresh set of attempts"""
+        with self._transaction() as conn:
+            return conn.execute(
+                """
+                UPDATE tasks SET status = 'pending', attempts = 0, available_at = ?, updated_at = ?
+                WHERE queue = ? AND status = 'dead'
+                """,
+                (time.time(), time.time(), queue),
+            ).rowcount
+
+    def counts(self, queue: str) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM tasks WHERE queue = ? GROUP BY status", (queue,))
+        return {status: count for status, count in rows}
+
+    def is_drained(self, queue: str) -> bool:
+        """No task is pending or leased"""
+        counts = self.counts(queue)
+        return not counts.get("pending") and not counts.get("leased")
+
+    def next_ready_in(self, queue: str) -> Optional[float]:
+        """Seconds until a pending task's backoff or a lease runs out; None if nothing is waiting"""
+        row = self._conn().execute(
+            """
+            SELECT MIN(CASE WHEN status = 'pending' THEN available_at ELSE lease_expires END)
+            FROM tasks WHERE queue = ? AND status IN ('pending', 'leased')
+            """,
+            (queue,),
+        ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def tasks(self, queue: str, status: Optional[str] = None) -> List[Task]:
+        """Tasks in the order they were enqueued, with results and errors"""
+        query = "SELECT * FROM tasks WHERE queue = ?"
+        params = [queue]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        return [Task.from_row(row) for row in self._conn().execute(query + " ORDER BY id", params)]
+
+
+class Heartbeat:
+    """Keeps a task's lease alive from a background thread while the block runs"""
+
+    def __init__(self, work_queue: WorkQueue, task: Task, worker_id: str, lease_seconds: float):
+        self.work_queue = work_queue
+        self.task = task
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                if not self.work_queue.heartbeat(self.task, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            self.work_queue.close()  # This thread's connection
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose host buckets are stored in the work queue file, so
+    all workers together stay within one politeness budget (and share its
+    adaptive backoff) however many worker processes there are.
+    """
+
+    clock = staticmethod(time.time)  # Bucket timestamps are compared across processes
+
+    def __init__(self, work_queue: WorkQueue, **kwargs):
+        super().__init__(**kwargs)
+        self.work_queue = work_queue
+
+    @contextmanager
+    def _locked_bucket(self, url: Optional[str]) -> Iterator[TokenBucket]:
+        host = self._host(url)
+        with self._lock, self.work_queue._transaction() as conn:
+            bucket = TokenBucket(self.initial_rate, self.burst, self.min_rate, self.max_rate)
+            bucket.updated = self.clock()
+            row = conn.execute("SELECT state FROM rate_buckets WHERE host = ?", (host,)).fetchone()
+            if row:
+                vars(bucket).update(json.loads(row["state"]))
+            yield bucket
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (host, state) VALUES (?, ?)", (host, json.dumps(vars(bucket)))
+            )
+            self.buckets[host] = bucket  # Latest copy, for stats()